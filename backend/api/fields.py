@@ -0,0 +1,61 @@
+import base64
+import binascii
+import uuid
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+
+class Base64ImageField(serializers.ImageField):
+    """Изображение в виде data URI: base64 декодируется один раз.
+
+    Проверку содержимого выполняет Pillow в ImageField, поэтому
+    поврежденные и не графические файлы отклоняются до сохранения.
+    """
+
+    default_error_messages = {
+        'invalid_base64': (
+            'Изображение должно быть в формате data URI base64.'
+        ),
+    }
+
+    def __init__(self, *args, file_prefix='image', **kwargs):
+        self.file_prefix = file_prefix
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            try:
+                header, encoded = data.split(';base64,')
+                content = base64.b64decode(encoded, validate=True)
+            except (ValueError, binascii.Error):
+                self.fail('invalid_base64')
+            extension = header.split('/')[-1]
+            data = ContentFile(
+                content,
+                name=f'{self.file_prefix}_{uuid.uuid4().hex}.{extension}'
+            )
+        return super().to_internal_value(data)
+
+
+class ImageVariantsField(serializers.Field):
+    """Ссылки на уменьшенные копии изображения по размерам и форматам."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        variants = {}
+        for size, formats in value.items():
+            if not isinstance(formats, dict):
+                continue
+            variants[size] = {}
+            for image_format, name in formats.items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                variants[size][image_format] = url
+        return variants
@@ -1,6 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
-from recipes.models import Ingredient, Tag, Recipe
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tag
+)
+from recipes.search import search
 
 
 User = get_user_model()
@@ -16,29 +24,52 @@ class IngredientFilter(filters.FilterSet):
 
 
 class RecipesFilter(filters.FilterSet):
-    """Фильтр для вью рецепты."""
+    """Фильтр для вью рецепты.
+
+    Связи проверяются коррелированными EXISTS: без JOIN рецепты
+    не дублируются, и DISTINCT не нужен.
+    """
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
     tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
         queryset=Tag.objects.all(),
-        to_field_name='slug'
+        to_field_name='slug',
+        method='filter_tags'
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
-        fields = ['is_favorited', 'is_in_shopping_cart', 'author', 'tags']
+        fields = [
+            'is_favorited', 'is_in_shopping_cart', 'author', 'tags', 'search'
+        ]
+
+    @staticmethod
+    def in_user_list(queryset, model_class, user):
+        return queryset.filter(Exists(model_class.objects.filter(
+            recipe_id=OuterRef('pk'), user=user
+        )))
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk'), tag_id__in=[tag.id for tag in value]
+        )))
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(favoriterecipe__user=user)
+            return self.in_user_list(queryset, FavoriteRecipe, user)
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(shoppingcart__user=user)
+            return self.in_user_list(queryset, ShoppingCart, user)
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search(queryset, value)
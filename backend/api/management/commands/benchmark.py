@@ -0,0 +1,441 @@
+import base64
+import contextlib
+import gc
+import io
+import json
+import math
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+from users.relations import invalidate_user_relations
+
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmark_baseline.json'
+DEFAULT_SIZES = '100,1000'
+USER_PREFIX = 'bench'
+# Задержки меньше миллисекунды сравниваются с запасом, иначе шум
+# планировщика дает ложные регрессии.
+LATENCY_SLACK_MS = 1.0
+# Рецептов в пакетных запросах избранного и корзины.
+BULK_SIZE = 10
+
+# Название, метод и URL маршрута, тело запроса, подготовка перед
+# каждым повтором и откат после него. Тела — ключи контекста, подготовка
+# и откат — (метод, URL, тело). URL подставляются из контекста, {created}
+# — id, созданный подготовкой или самим запросом.
+Route = namedtuple(
+    'Route', 'name method url data before after',
+    defaults=(None, None, None)
+)
+
+FAVORITE = '/api/recipes/{recipe_id}/favorite/'
+SHOPPING_CART = '/api/recipes/{recipe_id}/shopping_cart/'
+FAVORITE_BULK = '/api/recipes/favorite/bulk/'
+SHOPPING_CART_BULK = '/api/recipes/shopping_cart/bulk/'
+SUBSCRIBE = '/api/users/{author_id}/subscribe/'
+
+ROUTES = (
+    Route('recipes', 'get', '/api/recipes/'),
+    Route('recipes_anonymous', 'get', '/api/recipes/'),
+    Route('recipes_limit', 'get', '/api/recipes/?limit=50'),
+    Route('recipes_cursor', 'get', '/api/recipes/?pagination=cursor'),
+    Route('recipes_tags', 'get', '/api/recipes/?tags={tag}'),
+    Route('recipes_author', 'get', '/api/recipes/?author={author_id}'),
+    Route('recipes_favorited', 'get', '/api/recipes/?is_favorited=1'),
+    Route('recipes_in_cart', 'get', '/api/recipes/?is_in_shopping_cart=1'),
+    Route('recipes_search', 'get', '/api/recipes/?search=суп'),
+    Route('recipe_detail', 'get', '/api/recipes/{recipe_id}/'),
+    Route('recipe_link', 'get', '/api/recipes/{recipe_id}/get-link/'),
+    Route(
+        'recipe_create', 'post', '/api/recipes/', data='recipe',
+        after=('delete', '/api/recipes/{created}/', None)
+    ),
+    Route(
+        'recipe_update', 'patch', '/api/recipes/{own_recipe_id}/',
+        data='recipe_update'
+    ),
+    Route(
+        'recipe_delete', 'delete', '/api/recipes/{created}/',
+        before=('post', '/api/recipes/', 'recipe')
+    ),
+    Route('favorite', 'post', FAVORITE, after=('delete', FAVORITE, None)),
+    Route(
+        'shopping_cart', 'post', SHOPPING_CART,
+        after=('delete', SHOPPING_CART, None)
+    ),
+    Route(
+        'favorite_bulk', 'post', FAVORITE_BULK, data='bulk_add',
+        after=('post', FAVORITE_BULK, 'bulk_remove')
+    ),
+    Route(
+        'shopping_cart_bulk', 'post', SHOPPING_CART_BULK, data='bulk_add',
+        after=('post', SHOPPING_CART_BULK, 'bulk_remove')
+    ),
+    Route(
+        'download_txt', 'get',
+        '/api/recipes/download_shopping_cart/?format=txt'
+    ),
+    Route(
+        'download_csv', 'get',
+        '/api/recipes/download_shopping_cart/?format=csv'
+    ),
+    Route(
+        'download_pdf', 'get',
+        '/api/recipes/download_shopping_cart/?format=pdf'
+    ),
+    Route(
+        'clear_shopping_cart', 'delete', '/api/recipes/shopping_cart/',
+        after=('post', SHOPPING_CART_BULK, 'cart_restore')
+    ),
+    Route('users', 'get', '/api/users/'),
+    Route('users_me', 'get', '/api/users/me/'),
+    Route('user_detail', 'get', '/api/users/{author_id}/'),
+    Route('avatar', 'put', '/api/users/me/avatar/', data='avatar'),
+    Route('subscriptions', 'get', '/api/users/subscriptions/'),
+    Route('subscribe', 'post', SUBSCRIBE, after=('delete', SUBSCRIBE, None)),
+    Route('ingredients', 'get', '/api/ingredients/'),
+    Route('ingredients_search', 'get', '/api/ingredients/?name=сол'),
+    Route('tags', 'get', '/api/tags/'),
+    Route('short_link', 'get', '/s/{short_link}/'),
+)
+
+
+def image_data():
+    """Картинка 1x1 в data URI для рецептов и аватара."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (1, 1)).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class Rollback(Exception):
+    """Откат сгенерированных данных после замеров."""
+
+
+@contextlib.contextmanager
+def traced(peak):
+    """Добавляет в peak пик выделенной памяти внутри блока."""
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        peak.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет эндпоинты API на синтетических данных нескольких '
+        'размеров и сравнивает p50/p95, число запросов и пик памяти '
+        'с сохраненным базовым замером.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default=DEFAULT_SIZES,
+            help='Число рецептов в наборах через запятую.'
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--baseline', type=Path, default=DEFAULT_BASELINE
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=settings.BENCHMARK_THRESHOLD,
+            help='Допустимый рост задержки и памяти, доля от базового. '
+                 'Число запросов сравнивается строго.'
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Записать результаты как новый базовый замер.'
+        )
+        parser.add_argument(
+            '--routes', help='Только эти маршруты, через запятую.'
+        )
+        parser.add_argument(
+            '--retries',
+            type=int,
+            default=2,
+            help='Сколько раз перемерить маршруты, вышедшие за порог.'
+        )
+
+    def handle(self, *args, **options):
+        routes = ROUTES
+        if options['routes']:
+            names = set(options['routes'].split(','))
+            routes = [route for route in ROUTES if route.name in names]
+        results = {}
+        for size in map(int, options['sizes'].split(',')):
+            results[str(size)] = self.run_size(
+                size, routes, options['repeat'], options['seed']
+            )
+        if options['save_baseline']:
+            options['baseline'].write_text(
+                json.dumps(results, indent=2, ensure_ascii=False) + '\n'
+            )
+            self.stdout.write(
+                f'Базовый замер записан в {options["baseline"]}'
+            )
+            return
+        if not options['baseline'].exists():
+            raise CommandError(
+                f'Нет базового замера {options["baseline"]}, '
+                f'запустите с --save-baseline.'
+            )
+        baseline = json.loads(options['baseline'].read_text())
+        failures = self.compare(results, baseline, options['threshold'])
+        # Шум только замедляет, поэтому отклонившиеся маршруты
+        # перемеряются и берется лучший результат.
+        for _ in range(options['retries']):
+            if not failures:
+                break
+            self.stdout.write('Повторный замер маршрутов с отклонением')
+            failing = {}
+            for size, name, _message in failures:
+                failing.setdefault(size, set()).add(name)
+            for size, names in failing.items():
+                rerun = self.run_size(
+                    int(size),
+                    [route for route in routes if route.name in names],
+                    options['repeat'],
+                    options['seed']
+                )
+                for name, result in rerun.items():
+                    results[size][name] = {
+                        key: min(value, results[size][name][key])
+                        for key, value in result.items()
+                    }
+            failures = self.compare(results, baseline, options['threshold'])
+        if failures:
+            raise CommandError(
+                '\n'.join(message for _size, _name, message in failures)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
+
+    def run_size(self, size, routes, repeat, seed):
+        self.stdout.write(f'Набор на {size} рецептов')
+        results = {}
+        # Картинки рецептов и аватаров не должны оставаться в MEDIA_ROOT.
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root
+        ):
+            try:
+                with transaction.atomic():
+                    call_command(
+                        'generate_dataset',
+                        users=max(size // 10, 2),
+                        recipes=size,
+                        seed=seed,
+                        prefix=USER_PREFIX,
+                        stdout=io.StringIO(),
+                    )
+                    context, user = self.context()
+                    for route in routes:
+                        client = APIClient(
+                            HTTP_HOST=settings.ALLOWED_HOSTS[0]
+                        )
+                        if route.name != 'recipes_anonymous':
+                            client.force_authenticate(user)
+                        results[route.name] = self.measure(
+                            client, route, context, repeat
+                        )
+                        self.stdout.write(
+                            '  {name}: p50 {p50_ms} мс, p95 {p95_ms} мс, '
+                            '{queries} запросов, пик {peak_kb} КБ'.format(
+                                name=route.name, **results[route.name]
+                            )
+                        )
+                    raise Rollback
+            except Rollback:
+                invalidate_user_relations(user.id)
+        return results
+
+    @staticmethod
+    def context():
+        """Самый активный пользователь набора, объекты для URL и тела
+        запросов."""
+        user = User.objects.filter(
+            username__startswith=f'{USER_PREFIX}_'
+        ).order_by('-recipes_count', 'id').first()
+        author = User.objects.filter(
+            username__startswith=f'{USER_PREFIX}_'
+        ).exclude(pk=user.pk).order_by('-subscribers_count', 'id').first()
+        free = Recipe.objects.exclude(
+            favoriterecipe__user=user
+        ).exclude(shoppingcart__user=user).order_by('-id')
+        recipe = free.first()
+        bulk = list(free.values_list('id', flat=True)[1:BULK_SIZE + 1])
+        own = Recipe.objects.filter(author=user).order_by('-id').first()
+        tag_id, tag = Tag.objects.order_by('id').values_list(
+            'id', 'slug'
+        ).first()
+        own_ingredients = [
+            {'id': ingredient_id, 'amount': amount}
+            for ingredient_id, amount in own.recipe_ingredients.values_list(
+                'ingredient_id', 'amount'
+            )
+        ]
+        user.subscriptions.filter(subscribed_to=author).delete()
+        return {
+            'recipe_id': recipe.id,
+            'own_recipe_id': own.id,
+            'author_id': author.id,
+            'tag': tag,
+            'short_link': recipe.short_link,
+            'recipe': {
+                'name': 'Бенчмарк',
+                'text': 'Рецепт для замера.',
+                'cooking_time': 10,
+                'image': image_data(),
+                'tags': [tag_id],
+                'ingredients': [
+                    {'id': ingredient_id, 'amount': 100}
+                    for ingredient_id in Ingredient.objects.order_by(
+                        'id'
+                    ).values_list('id', flat=True)[:5]
+                ],
+            },
+            # Тот же состав: повторы не меняют данные других маршрутов.
+            'recipe_update': {
+                'name': own.name,
+                'text': own.text,
+                'cooking_time': own.cooking_time,
+                'tags': list(own.tags.values_list('id', flat=True)),
+                'ingredients': own_ingredients,
+            },
+            'bulk_add': {'add': bulk},
+            'bulk_remove': {'remove': bulk},
+            'cart_restore': {'add': list(user.shoppingcart.values_list(
+                'recipe_id', flat=True
+            ))},
+            'avatar': {'avatar': image_data()},
+        }, user
+
+    @staticmethod
+    def request(client, method, url, data=None):
+        if data is None:
+            response = getattr(client, method)(url)
+        else:
+            response = getattr(client, method)(url, data, format='json')
+        if response.status_code >= 400:
+            raise CommandError(f'{method.upper()} {url}: '
+                               f'статус {response.status_code}')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def call(self, client, route, context, around=contextlib.nullcontext):
+        """Запрос маршрута с подготовкой и откатом.
+
+        Время и around охватывают только сам запрос.
+        """
+        context = dict(context)
+        if route.before:
+            method, url, data = route.before
+            response = self.request(
+                client, method, url.format(**context), context.get(data)
+            )
+            context['created'] = response.data['id']
+        with around():
+            started = time.perf_counter()
+            response = self.request(
+                client,
+                route.method,
+                route.url.format(**context),
+                context.get(route.data)
+            )
+            elapsed = time.perf_counter() - started
+        data = getattr(response, 'data', None)
+        if 'created' not in context and isinstance(data, dict):
+            context['created'] = data.get('id')
+        if route.after:
+            method, url, data = route.after
+            self.request(
+                client, method, url.format(**context), context.get(data)
+            )
+        return elapsed
+
+    def measure(self, client, route, context, repeat):
+        timings = []
+        # Сборщик мусора дает случайные паузы, которые шумят в p95.
+        gc.collect()
+        gc.disable()
+        try:
+            # Первый запрос прогревает кеши и не учитывается.
+            for index in range(repeat + 1):
+                elapsed = self.call(client, route, context)
+                if index:
+                    timings.append(elapsed * 1000)
+        finally:
+            gc.enable()
+        # Журнал запросов ограничен по длине и уже заполнен генерацией.
+        reset_queries()
+        queries = CaptureQueriesContext(connection)
+        self.call(client, route, context, lambda: queries)
+        # Список запросов — срез журнала, а следующий запрос его очистит.
+        queries = len(queries)
+        peak = []
+        self.call(client, route, context, lambda: traced(peak))
+        timings.sort()
+        return {
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(
+                timings[math.ceil(len(timings) * 0.95) - 1], 3
+            ),
+            'queries': queries,
+            'peak_kb': round(peak[0] / 1024, 1),
+        }
+
+    @staticmethod
+    def compare(results, baseline, threshold):
+        """Отклонения от базового замера: (размер, маршрут, описание)."""
+        failures = []
+        for size, routes in results.items():
+            for name, result in routes.items():
+                base = baseline.get(size, {}).get(name)
+                if base is None:
+                    continue
+                where = f'{name} на {size} рецептов'
+                if result['queries'] > base['queries']:
+                    failures.append((
+                        size, name,
+                        f'{where}: запросов {result["queries"]}, '
+                        f'было {base["queries"]}'
+                    ))
+                for key in ('p50_ms', 'p95_ms'):
+                    limit = max(
+                        base[key] * (1 + threshold),
+                        base[key] + LATENCY_SLACK_MS
+                    )
+                    if result[key] > limit:
+                        failures.append((
+                            size, name,
+                            f'{where}: {key} {result[key]}, '
+                            f'было {base[key]}'
+                        ))
+                if result['peak_kb'] > base['peak_kb'] * (1 + threshold):
+                    failures.append((
+                        size, name,
+                        f'{where}: пик памяти {result["peak_kb"]} КБ, '
+                        f'было {base["peak_kb"]} КБ'
+                    ))
+        return failures
@@ -0,0 +1,104 @@
+import io
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from users.models import User
+from users.relations import invalidate_user_relations
+
+
+USER_PREFIX = 'render'
+
+RENDERERS = (
+    ('json', JSONRenderer(), JSONParser()),
+    ('fast', FastJSONRenderer(), FastJSONParser()),
+)
+
+
+class Rollback(Exception):
+    """Откат сгенерированных данных после замеров."""
+
+
+def timed(function, repeat):
+    """Медиана времени вызова в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время и размер JSON страницы рецептов для '
+        'стандартного и быстрого рендерера, а также время разбора.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                call_command(
+                    'generate_dataset',
+                    users=10,
+                    recipes=options['limit'],
+                    seed=options['seed'],
+                    prefix=USER_PREFIX,
+                    stdout=io.StringIO(),
+                )
+                user = User.objects.filter(
+                    username__startswith=f'{USER_PREFIX}_'
+                ).order_by('id').first()
+                data = self.page(user, options['limit'])
+                raise Rollback
+        except Rollback:
+            invalidate_user_relations(user.id)
+        self.stdout.write(
+            f'Страница из {len(data["results"])} рецептов, '
+            f'{options["repeat"]} повторов'
+        )
+        expected = None
+        for name, renderer, parser in RENDERERS:
+            body = renderer.render(data, renderer.media_type, {})
+            parsed = json.loads(body)
+            if expected is None:
+                expected = parsed
+            elif parsed != expected:
+                raise CommandError(f'{name}: ответ отличается от JSON DRF.')
+            render_ms = timed(
+                lambda: renderer.render(data, renderer.media_type, {}),
+                options['repeat']
+            )
+            parse_ms = timed(
+                lambda: parser.parse(io.BytesIO(body)),
+                options['repeat']
+            )
+            self.stdout.write(
+                f'  {name}: рендер {render_ms:.3f} мс, '
+                f'разбор {parse_ms:.3f} мс, {len(body)} байт'
+            )
+
+    @staticmethod
+    def page(user, limit):
+        """Данные ответа списка рецептов до рендеринга."""
+        client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        client.force_authenticate(user)
+        response = client.get(f'/api/recipes/?limit={limit}')
+        if response.status_code != 200:
+            raise CommandError(f'Статус {response.status_code}')
+        return response.data
@@ -0,0 +1,93 @@
+import hashlib
+
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from backend.lru import LRUCache
+from backend.metrics import record_cache
+from recipes import constants
+from recipes.versions import get_version
+
+
+class ConditionalReferenceMixin:
+    """Условные GET-запросы для редко меняющихся справочников.
+
+    ETag и Last-Modified берутся из версии справочника в общем кеше,
+    поэтому ответ 304 отдается без обращения к БД. Тело JSON хранится
+    в кеше процесса до смены версии.
+    """
+
+    version_name = None
+    body_cache = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.body_cache = LRUCache(
+            maxsize=constants.REFERENCE_BODY_CACHE_SIZE,
+            ttl=constants.REFERENCE_BODY_CACHE_TTL
+        )
+
+    def perform_authentication(self, request):
+        """Справочники публичны: токен не проверяется и не читается из БД."""
+
+    def get_etag(self, request, version):
+        digest = hashlib.md5(
+            f'{version}:{request.get_full_path()}'.encode()
+        ).hexdigest()
+        return f'"{self.version_name}-{digest}"'
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            etags = {tag.strip() for tag in if_none_match.split(',')}
+            return etag in etags or '*' in etags
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return (
+            if_modified_since is not None
+            and last_modified <= if_modified_since
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        version, last_modified = get_version(self.version_name)
+        etag = self.get_etag(request, version)
+        if self.is_not_modified(request, etag, last_modified):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif isinstance(request.accepted_renderer, JSONRenderer):
+            body = self.body_cache.get(etag)
+            record_cache('reference_bodies', body is not None)
+            if body is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                body = request.accepted_renderer.render(
+                    response.data,
+                    request.accepted_media_type,
+                    self.get_renderer_context()
+                )
+                self.body_cache.set(etag, body)
+            response = HttpResponse(
+                body, content_type=request.accepted_renderer.media_type
+            )
+        else:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(
+            response, public=True, max_age=constants.REFERENCE_MAX_AGE
+        )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
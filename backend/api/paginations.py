@@ -1,7 +1,51 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class ApiPagination(PageNumberPagination):
     """Пагинация для постов, с максимальным лимитом."""
 
     page_size_query_param = 'limit'
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Курсорная пагинация ленты рецептов без COUNT(*) и OFFSET."""
+
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'limit'
+
+
+class RecipePagination(ApiPagination):
+    """Постраничная пагинация рецептов с курсорным режимом по запросу.
+
+    Курсорный режим включается параметром ``?pagination=cursor``, ссылки
+    ``next``/``previous`` в ответе уже содержат курсор. Курсор упорядочен
+    по дате, поэтому с ``?search=`` остается постраничный режим, чтобы
+    не потерять сортировку по релевантности.
+    """
+
+    mode_query_param = 'pagination'
+    search_query_param = 'search'
+    cursor_pagination_class = RecipeCursorPagination
+
+    def is_cursor_mode(self, request):
+        if request.query_params.get(self.search_query_param):
+            return False
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.is_cursor_mode(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,176 @@
+import abc
+import csv
+import io
+import os
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSON через orjson, если он установлен.
+
+    Типы, которых нет в JSON (Decimal, даты и время, ленивые строки,
+    QuerySet), приводятся кодировщиком DRF, поэтому ответ совпадает с
+    JSONRenderer. Отступы, ensure_ascii, целые вне 64 бит и нестроковые
+    ключи словарей отдаются стандартному json. NaN и бесконечность
+    кодируются как null.
+    """
+
+    option = orjson and orjson.OPT_PASSTHROUGH_DATETIME
+    default = staticmethod(encoders.JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        if data is None:
+            return b''
+        try:
+            ret = orjson.dumps(
+                data, default=self.default, option=self.option
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        # Как и DRF, экранируем разделители строк для встраивания в JS.
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
+
+
+class ShoppingListRenderer(renderers.BaseRenderer, metaclass=abc.ABCMeta):
+    """Базовый рендерер списка покупок.
+
+    Строки списка отдаются потоково через ``stream``: заголовок, затем
+    по строке ``row`` на ингредиент. ``render`` нужен DRF только для
+    ответов с ошибками.
+    """
+
+    charset = 'utf-8'
+    title = 'Список покупок'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            data = '\n'.join(f'{key}: {value}' for key, value in data.items())
+        return str(data).encode('utf-8')
+
+    def header(self):
+        return f'{self.title}:\n\n'
+
+    @abc.abstractmethod
+    def row(self, ingredient):
+        """Строка списка для одного ингредиента."""
+
+    def stream(self, ingredients):
+        yield self.header()
+        for ingredient in ingredients:
+            yield self.row(ingredient)
+
+
+class ShoppingListTextRenderer(ShoppingListRenderer):
+    """Список покупок простым текстом."""
+
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def row(self, ingredient):
+        return (
+            f'{ingredient["name"]} ({ingredient["measurement_unit"]})'
+            f' — {ingredient["amount"]}\n'
+        )
+
+
+class Echo:
+    """Псевдо-файл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListCSVRenderer(ShoppingListRenderer):
+    """Список покупок в CSV."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    writer = csv.writer(Echo())
+
+    def header(self):
+        return self.writer.writerow(
+            ['Ингредиент', 'Единица измерения', 'Количество']
+        )
+
+    def row(self, ingredient):
+        return self.writer.writerow([
+            ingredient['name'],
+            ingredient['measurement_unit'],
+            ingredient['amount'],
+        ])
+
+
+class ShoppingListPDFRenderer(ShoppingListRenderer):
+    """Список покупок в PDF с разбивкой на страницы."""
+
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_name = 'ShoppingListFont'
+    font_size = 12
+    line_height = 18
+    margin = 50
+    chunk_size = 64 * 1024
+
+    def get_font(self):
+        if self.font_name in pdfmetrics.getRegisteredFontNames():
+            return self.font_name
+        font_path = settings.SHOPPING_LIST_PDF_FONT
+        if not os.path.exists(font_path):
+            return 'Helvetica'
+        pdfmetrics.registerFont(TTFont(self.font_name, font_path))
+        return self.font_name
+
+    def row(self, ingredient):
+        return (
+            f'{ingredient["name"]} ({ingredient["measurement_unit"]})'
+            f' — {ingredient["amount"]}'
+        )
+
+    def stream(self, ingredients):
+        """Страницы PDF собираются в буфер и отдаются частями."""
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        font = self.get_font()
+        width, height = A4
+        top = height - self.margin
+        pdf.setFont(font, self.font_size + 4)
+        pdf.drawString(self.margin, top, self.title)
+        y = top - self.line_height * 2
+        for ingredient in ingredients:
+            if y < self.margin:
+                pdf.showPage()
+                y = top
+            pdf.setFont(font, self.font_size)
+            pdf.drawString(self.margin, y, self.row(ingredient))
+            y -= self.line_height
+        pdf.save()
+        buffer.seek(0)
+        while True:
+            chunk = buffer.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
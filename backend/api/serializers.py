@@ -1,9 +1,9 @@
-import base64
-
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
+from django.db import transaction
 from rest_framework import serializers
 
+from api.fields import Base64ImageField, ImageVariantsField
+from recipes.constants import BULK_RECIPES_LIMIT
 from recipes.models import (
     FavoriteRecipe,
     Ingredient,
@@ -12,6 +12,8 @@ from recipes.models import (
     ShoppingCart,
     Tag
 )
+from recipes.shopping_list import set_ingredients
+from users.relations import get_user_relations
 from users.serializers import UserDetailSerializer
 
 
@@ -62,7 +64,9 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         many=True,
         required=True
     )
-    image = serializers.ImageField(required=True, allow_null=False)
+    image = Base64ImageField(
+        required=True, allow_null=False, file_prefix='recipe_image'
+    )
 
     class Meta:
         model = Recipe
@@ -76,17 +80,6 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'cooking_time'
         ]
 
-    def to_internal_value(self, data):
-        if 'image' in data and data['image']:
-            data['image'] = self.handle_image_upload(data['image'])
-        return super().to_internal_value(data)
-
-    def handle_image_upload(self, image_data):
-        format, imgstr = image_data.split(';base64,')
-        ext = format.split('/')[-1]
-        img = ContentFile(base64.b64decode(imgstr), name=f"recipe_image.{ext}")
-        return img
-
     def validate(self, data):
         ingredients = data.get('ingredients')
         if not ingredients:
@@ -120,35 +113,31 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             )
         return data
 
-    @staticmethod
-    def handle_ingredients_and_tags(instance, ingredients_data, tags_data):
-        if ingredients_data:
-            instance.recipe_ingredients.all().delete()
-            recipe_ingredients = [
-                RecipeIngredient(recipe=instance, **ingredient_data)
-                for ingredient_data in ingredients_data
-            ]
-            RecipeIngredient.objects.bulk_create(recipe_ingredients)
-
-        if tags_data:
-            instance.tags.set(tags_data)
-
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients', [])
         tags_data = validated_data.pop('tags', [])
         user = self.context['request'].user
         recipe = Recipe.objects.create(author=user, **validated_data)
-        self.handle_ingredients_and_tags(recipe, ingredients_data, tags_data)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, **ingredient_data)
+            for ingredient_data in ingredients_data
+        )
+        recipe.tags.set(tags_data)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop('ingredients', None)
         tags_data = validated_data.pop('tags', None)
         instance = super().update(instance, validated_data)
         if ingredients_data is not None:
-            instance.recipe_ingredients.all().delete()
-            self.handle_ingredients_and_tags(instance, ingredients_data, [])
+            set_ingredients(instance, {
+                ingredient_data['ingredient'].id: ingredient_data['amount']
+                for ingredient_data in ingredients_data
+            })
         if tags_data is not None:
+            # set() сам вычисляет разницу с текущими тегами.
             instance.tags.set(tags_data)
         return instance
 
@@ -164,6 +153,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         source='recipe_ingredients', many=True, read_only=True
     )
     author = UserDetailSerializer(read_only=True)
+    images = ImageVariantsField(source='image_variants')
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -178,33 +168,28 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'images',
             'text',
             'cooking_time'
         ]
 
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return FavoriteRecipe.objects.filter(
-                user=request.user, recipe=obj
-            ).exists()
-        return False
+        relations = get_user_relations(self.context.get('request'))
+        return relations is not None and obj.id in relations.favorites
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return ShoppingCart.objects.filter(
-                user=request.user, recipe=obj
-            ).exists()
-        return False
+        relations = get_user_relations(self.context.get('request'))
+        return relations is not None and obj.id in relations.shopping_cart
 
 
 class ShortRecipesSerializer(serializers.ModelSerializer):
     """Упрощенный сериализатор для рецептов."""
 
+    images = ImageVariantsField(source='image_variants')
+
     class Meta:
         model = Recipe
-        fields = ['id', 'name', 'image', 'cooking_time']
+        fields = ['id', 'name', 'image', 'images', 'cooking_time']
 
 
 class FavoriteRecipeSerializer(serializers.ModelSerializer):
@@ -231,3 +216,31 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         if ShoppingCart.objects.filter(user=user, recipe=recipe).exists():
             raise serializers.ValidationError("Рецепт уже в списке покупок!")
         return data
+
+
+class BulkRecipeListSerializer(serializers.Serializer):
+    """Сериализатор пакетного изменения избранного или корзины."""
+
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=BULK_RECIPES_LIMIT,
+        required=False,
+        default=list
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=BULK_RECIPES_LIMIT,
+        required=False,
+        default=list
+    )
+
+    def validate(self, data):
+        if not data['add'] and not data['remove']:
+            raise serializers.ValidationError(
+                "Передайте рецепты в add или remove."
+            )
+        if set(data['add']) & set(data['remove']):
+            raise serializers.ValidationError(
+                "Рецепт не может быть одновременно в add и remove."
+            )
+        return data
@@ -1,15 +1,25 @@
 import os
 from dotenv import load_dotenv
 from django_filters.rest_framework import DjangoFilterBackend
-from django.http import HttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import F, Prefetch
+from django.http import StreamingHttpResponse
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
 from api.filters import IngredientFilter, RecipesFilter
+from api.mixins import ConditionalReferenceMixin
+from api.paginations import RecipePagination
 from api.permissions import IsAuthorOrReadOnly
+from api.renderers import (
+    ShoppingListCSVRenderer,
+    ShoppingListPDFRenderer,
+    ShoppingListTextRenderer
+)
 from api.serializers import (
+    BulkRecipeListSerializer,
     IngredientSerializer,
     RecipeCreateSerializer,
     FavoriteRecipeSerializer,
@@ -21,9 +31,15 @@ from recipes.models import (
     FavoriteRecipe,
     Ingredient,
     Recipe,
+    RecipeIngredient,
     ShoppingCart,
+    ShoppingListItem,
     Tag,
 )
+from recipes.constants import INGREDIENT_SEARCH_LIMIT
+from recipes.ingredient_index import ingredient_index
+from recipes.lists import add_many, remove_many
+from users.relations import invalidate_user_relations
 
 
 load_dotenv()
@@ -37,8 +53,28 @@ class RecipesViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthorOrReadOnly]
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipesFilter
+    pagination_class = RecipePagination
     http_method_names = ['get', 'post', 'delete', 'patch']
 
+    def get_queryset(self):
+        """Список и детали рецепта за постоянное число запросов.
+
+        Флаги избранного, корзины и подписки берутся из множеств
+        users.relations, поэтому подзапросы для них не нужны.
+        """
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        return queryset.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                )
+            ),
+        )
+
     @staticmethod
     def add_to_list(
         request,
@@ -52,7 +88,14 @@ class RecipesViewSet(viewsets.ModelViewSet):
         }
         serializer = serializer_class(data=data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except IntegrityError:
+                return Response(
+                    {'detail': 'Рецепт уже в списке.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             recipe_serializer = ShortRecipesSerializer(recipe)
             return Response(
                 recipe_serializer.data,
@@ -72,6 +115,83 @@ class RecipesViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    @staticmethod
+    def bulk_update_list(request, model_class):
+        """Добавляет и удаляет рецепты списка пакетом, идемпотентно.
+
+        Возвращает статус для каждого переданного id. Статусы, счетчики
+        и список покупок строятся по строкам, которые действительно
+        вставлены или удалены этим запросом.
+        """
+        serializer = BulkRecipeListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        add = serializer.validated_data['add']
+        remove = serializer.validated_data['remove']
+        user = request.user
+        found = set(Recipe.objects.filter(
+            id__in=add + remove
+        ).values_list('id', flat=True))
+        add = list(dict.fromkeys(add))
+        remove = list(dict.fromkeys(remove))
+        with transaction.atomic():
+            added = add_many(model_class, user.id, [
+                recipe_id for recipe_id in add if recipe_id in found
+            ])
+            removed = remove_many(model_class, user.id, [
+                recipe_id for recipe_id in remove if recipe_id in found
+            ])
+            transaction.on_commit(lambda: invalidate_user_relations(user.id))
+        results = []
+        for recipe_id in add:
+            if recipe_id not in found:
+                result = 'not_found'
+            elif recipe_id in added:
+                result = 'added'
+            else:
+                result = 'already_added'
+            results.append({'id': recipe_id, 'status': result})
+        for recipe_id in remove:
+            if recipe_id not in found:
+                result = 'not_found'
+            elif recipe_id in removed:
+                result = 'removed'
+            else:
+                result = 'not_in_list'
+            results.append({'id': recipe_id, 'status': result})
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='favorite/bulk',
+        permission_classes=[IsAuthenticated]
+    )
+    def favorite_bulk(self, request):
+        return self.bulk_update_list(request, FavoriteRecipe)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='shopping_cart/bulk',
+        permission_classes=[IsAuthenticated]
+    )
+    def shopping_cart_bulk(self, request):
+        return self.bulk_update_list(request, ShoppingCart)
+
+    @action(
+        detail=False,
+        methods=['delete'],
+        url_path='shopping_cart',
+        permission_classes=[IsAuthenticated]
+    )
+    def clear_shopping_cart(self, request):
+        """Очищает корзину пользователя одним DELETE ... RETURNING."""
+        user = request.user
+        with transaction.atomic():
+            remove_many(ShoppingCart, user.id)
+            transaction.on_commit(lambda: invalidate_user_relations(user.id))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -130,44 +250,50 @@ class RecipesViewSet(viewsets.ModelViewSet):
         detail=False,
         methods=['get'],
         url_path='download_shopping_cart',
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            ShoppingListTextRenderer,
+            ShoppingListCSVRenderer,
+            ShoppingListPDFRenderer,
+        ]
     )
     def download_shopping_cart(self, request):
-        shopping_cart_recipes = ShoppingCart.objects.filter(user=request.user)
-        ingredients = {}
-        for shopping_cart in shopping_cart_recipes:
-            recipe = shopping_cart.recipe
-            for recipe_ingredient in recipe.recipe_ingredients.all():
-                ingredient_name = recipe_ingredient.ingredient.name
-                measurement_unit = (
-                    recipe_ingredient.ingredient.measurement_unit
-                )
-                amount = recipe_ingredient.amount
-                key = f"{ingredient_name} ({measurement_unit})"
-                if key in ingredients:
-                    ingredients[key] += amount
-                else:
-                    ingredients[key] = amount
-        response_content = "Список покупок:\n\n"
-        for ingredient, amount in ingredients.items():
-            response_content += f"{ingredient} — {amount}\n"
-        response = HttpResponse(response_content, content_type='text/plain')
+        """Список покупок из готовых сумм, формат из ?format=."""
+        ingredients = ShoppingListItem.objects.filter(
+            user=request.user
+        ).values(
+            'amount',
+            name=F('ingredient__name'),
+            measurement_unit=F('ingredient__measurement_unit'),
+        ).order_by('name', 'measurement_unit')
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients.iterator()),
+            content_type=content_type
+        )
         response['Content-Disposition'] = (
-            'attachment; filename="shopping_cart.txt"'
+            f'attachment; filename="shopping_cart.{renderer.format}"'
         )
         return response
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ConditionalReferenceMixin, viewsets.ReadOnlyModelViewSet):
     """Вью для тегов."""
 
     queryset = Tag.objects.all()
     permission_classes = [AllowAny]
     pagination_class = None
     serializer_class = TagSerializer
+    version_name = 'tags'
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(
+    ConditionalReferenceMixin,
+    viewsets.ReadOnlyModelViewSet
+):
     """Вью для ингредиентов."""
 
     queryset = Ingredient.objects.all()
@@ -176,3 +302,15 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
+    version_name = 'ingredients'
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get('name'):
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(self.autocomplete, request)
+
+    def autocomplete(self, request):
+        """Автодополнение по названию из индекса в памяти, без БД."""
+        return Response(ingredient_index.search(
+            request.query_params['name'], INGREDIENT_SEARCH_LIMIT
+        ))
@@ -0,0 +1,192 @@
+import contextvars
+import json
+import logging
+import re
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+
+logger = logging.getLogger(__name__)
+
+_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+# Списки параметров разной длины дают одну и ту же форму запроса.
+PARAMS_LIST = re.compile(r'\(%s(?:, %s)*\)(?:, \(%s(?:, %s)*\))*')
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем позволяет бюджет."""
+
+
+class RequestMetrics:
+    """Время и запросы к БД одного HTTP-запроса."""
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.shapes = Counter()
+
+    @property
+    def queries(self):
+        return sum(self.shapes.values())
+
+    def repeated(self):
+        """Формы запросов, повторенные много раз, — признак N+1."""
+        threshold = settings.PERFORMANCE_REPEATED_QUERY_THRESHOLD
+        return {
+            shape: count for shape, count in self.shapes.items()
+            if count >= threshold
+        }
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.shapes[PARAMS_LIST.sub('(...)', sql)] += 1
+
+
+def timed_data(data):
+    """Оборачивает Serializer.data, вложенные вызовы не учитываются."""
+    def wrapper(self):
+        metrics = _metrics.get()
+        if metrics is None or metrics.serializing:
+            return data.fget(self)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return data.fget(self)
+        finally:
+            metrics.serializing = False
+            metrics.serializer_time += time.perf_counter() - started
+    wrapper.instrumented = True
+    return property(wrapper)
+
+
+def record_query(execute, sql, params, many, context):
+    """Обертка всех соединений: передает запрос метрикам текущего
+    HTTP-запроса.
+
+    Метрики берутся из контекста, поэтому учитываются и запросы из
+    потоков sync_to_async под ASGI.
+    """
+    metrics = _metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.execute(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    # В начало списка: execute_wrapper() снимает обертки с конца.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def instrument_serializers():
+    for serializer_class in (serializers.Serializer,
+                             serializers.ListSerializer):
+        if not getattr(serializer_class.data.fget, 'instrumented', False):
+            serializer_class.data = timed_data(serializer_class.data)
+
+
+class PerformanceMiddleware:
+    """Замеряет время запроса, работу с БД и сериализацию.
+
+    Включается настройкой PERFORMANCE_INSTRUMENTATION. Результат
+    отдается в заголовке Server-Timing и пишется в лог одной строкой
+    JSON. Работает и в синхронной, и в асинхронной цепочке middleware.
+    Для потоковых ответов учитывается только работа до начала
+    отдачи тела. Превышение бюджета запросов представления логируется или,
+    при PERFORMANCE_QUERY_BUDGET_RAISE, поднимает исключение.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        instrument_serializers()
+        connection_created.connect(
+            install_query_recorder,
+            dispatch_uid='performance_query_recorder'
+        )
+        for connection in connections.all():
+            install_query_recorder(connection=connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.report(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.report(request, response, metrics, started)
+
+    def report(self, request, response, metrics, started):
+        total = time.perf_counter() - started
+        view_name = (
+            request.resolver_match.view_name
+            if request.resolver_match else None
+        )
+        repeated = metrics.repeated()
+        response['Server-Timing'] = ', '.join((
+            f'total;dur={total * 1000:.1f}',
+            f'db;dur={metrics.db_time * 1000:.1f};'
+            f'desc="{metrics.queries} queries"',
+            f'serializer;dur={metrics.serializer_time * 1000:.1f}',
+            f'repeated;desc="{len(repeated)} shapes"',
+        ))
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'queries': metrics.queries,
+            'serializer_ms': round(metrics.serializer_time * 1000, 1),
+            'repeated': repeated,
+            'streaming': response.streaming,
+        }, ensure_ascii=False))
+        # Тело потокового ответа строится уже после выхода из middleware.
+        if not response.streaming:
+            self.check_budget(view_name, metrics.queries)
+        return response
+
+    @staticmethod
+    def check_budget(view_name, queries):
+        budget = settings.PERFORMANCE_QUERY_BUDGETS.get(
+            view_name, settings.PERFORMANCE_QUERY_BUDGET_DEFAULT
+        )
+        if budget is None or queries <= budget:
+            return
+        message = f'{view_name}: {queries} запросов при бюджете {budget}'
+        if settings.PERFORMANCE_QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,200 @@
+import contextvars
+import hmac
+import ipaddress
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+
+# Метрики пишутся в файлы каталога PROMETHEUS_MULTIPROC_DIR, если он
+# задан, и суммируются по всем процессам gunicorn при отдаче /metrics.
+REQUESTS = Counter(
+    'http_requests_total',
+    'HTTP-запросы по представлению, методу и статусу.',
+    ['view', 'method', 'status'],
+)
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Время обработки HTTP-запроса.',
+    ['view', 'method'],
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+    ),
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Число запросов к БД на HTTP-запрос.',
+    ['view'],
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64, 128),
+)
+DB_TIME = Histogram(
+    'http_request_db_duration_seconds',
+    'Время запросов к БД на HTTP-запрос.',
+    ['view'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes',
+    'Размер тела ответа, без потоковых ответов.',
+    ['view'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576),
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Обращения к кешам приложения.',
+    ['cache', 'result'],
+)
+
+
+def record_cache(name, hit):
+    CACHE_REQUESTS.labels(name, 'hit' if hit else 'miss').inc()
+
+
+class QueryCounter:
+    """Число и время запросов к БД без разбора SQL."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+
+_queries = contextvars.ContextVar('metrics_queries', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """Обертка всех соединений: считает запросы текущего HTTP-запроса.
+
+    Счетчик берется из контекста, поэтому запросы из потоков
+    sync_to_async и пула асинхронных представлений тоже учитываются.
+    """
+    queries = _queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.time += time.perf_counter() - started
+        queries.count += 1
+
+
+def install_query_counter(sender=None, connection=None, **kwargs):
+    # В начало списка: execute_wrapper() снимает обертки с конца.
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+class MetricsMiddleware:
+    """Собирает метрики запросов для Prometheus.
+
+    Работает и в синхронной, и в асинхронной цепочке middleware.
+    Отключается настройкой METRICS_ENABLED.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(
+            install_query_counter, dispatch_uid='metrics_query_counter'
+        )
+        for connection in connections.all():
+            install_query_counter(connection=connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        queries = QueryCounter()
+        token = _queries.set(queries)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.observe(request, response, queries, started)
+        return response
+
+    async def __acall__(self, request):
+        queries = QueryCounter()
+        token = _queries.set(queries)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.observe(request, response, queries, started)
+        return response
+
+    @staticmethod
+    def observe(request, response, queries, started):
+        elapsed = time.perf_counter() - started
+        view = (
+            request.resolver_match.view_name
+            if request.resolver_match else 'unmatched'
+        )
+        REQUESTS.labels(view, request.method, response.status_code).inc()
+        REQUEST_LATENCY.labels(view, request.method).observe(elapsed)
+        DB_QUERIES.labels(view).observe(queries.count)
+        DB_TIME.labels(view).observe(queries.time)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(view).observe(len(response.content))
+
+
+ALLOWED_NETWORKS = [
+    ipaddress.ip_network(network.strip())
+    for network in settings.METRICS_ALLOWED_NETWORKS if network.strip()
+]
+
+
+def is_allowed(request):
+    """Доступ к метрикам по токену или с разрешенного адреса."""
+    token = settings.METRICS_TOKEN
+    if token and hmac.compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', '').encode(),
+        f'Bearer {token}'.encode()
+    ):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in network for network in ALLOWED_NETWORKS)
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus.
+
+    Выключены без METRICS_ENABLED, доступ ограничен is_allowed.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not is_allowed(request):
+        return HttpResponseForbidden()
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
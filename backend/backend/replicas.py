@@ -0,0 +1,176 @@
+import contextvars
+import hashlib
+import itertools
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_KEY = 'db_pin:{}'
+
+_read_from_replica = contextvars.ContextVar(
+    'read_from_replica', default=False
+)
+
+
+class ReplicaPool:
+    """Выбор реплики по результатам фоновой проверки доступности.
+
+    Поток процесса раз в DATABASE_REPLICA_HEALTH_INTERVAL секунд
+    выполняет SELECT 1 на каждой реплике, запросы только читают
+    результат и не ждут соединения. До первой проверки и при
+    недоступности всех реплик чтение идет из основной БД.
+    """
+
+    def __init__(self, aliases):
+        self.aliases = aliases
+        self.healthy = []
+        self.latency = dict.fromkeys(aliases, 0.0)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.cycle = itertools.cycle(aliases)
+
+    def check(self):
+        healthy = []
+        for alias in self.aliases:
+            started = time.perf_counter()
+            try:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            except DatabaseError:
+                logger.warning('Реплика %s недоступна', alias, exc_info=True)
+                connections[alias].close()
+                continue
+            self.latency[alias] = time.perf_counter() - started
+            healthy.append(alias)
+        self.healthy = healthy
+
+    def monitor(self):
+        while True:
+            try:
+                self.check()
+            except Exception:
+                logger.exception('Ошибка проверки реплик')
+            time.sleep(settings.DATABASE_REPLICA_HEALTH_INTERVAL)
+
+    def start(self):
+        """Запускает проверку в процессе, после fork воркера — заново."""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(
+                target=self.monitor, name='replica-health', daemon=True
+            )
+            self.thread.start()
+
+    def choose(self):
+        self.start()
+        healthy = self.healthy
+        if not healthy:
+            return DEFAULT_DB_ALIAS
+        if settings.DATABASE_REPLICA_SELECTION == 'least_latency':
+            return min(healthy, key=self.latency.__getitem__)
+        for alias in self.cycle:
+            if alias in healthy:
+                return alias
+
+
+pool = ReplicaPool([
+    alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS
+])
+
+
+class ReplicaRouter:
+    """Чтение безопасных HTTP-запросов с реплик, запись в основную БД."""
+
+    def db_for_read(self, model, **hints):
+        if not _read_from_replica.get():
+            return DEFAULT_DB_ALIAS
+        # Внутри транзакции читаем то же, что пишем.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return pool.choose()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    """Разрешает чтение с реплик для GET/HEAD/OPTIONS.
+
+    После изменяющего запроса клиент на DATABASE_REPLICA_PIN_SECONDS
+    закрепляется за основной БД, чтобы видеть свои записи. Клиент
+    определяется по заголовку Authorization или cookie сессии.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not pool.aliases:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def pin_key(request):
+        identity = (
+            request.META.get('HTTP_AUTHORIZATION')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        )
+        if not identity:
+            return None
+        return PIN_KEY.format(hashlib.md5(identity.encode()).hexdigest())
+
+    @staticmethod
+    def pin(key):
+        if key is not None:
+            cache.set(key, True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+    @staticmethod
+    def is_pinned(key):
+        return key is not None and cache.get(key, False)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        key = self.pin_key(request)
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            self.pin(key)
+            return response
+        token = _read_from_replica.set(not self.is_pinned(key))
+        try:
+            return self.get_response(request)
+        finally:
+            _read_from_replica.reset(token)
+
+    async def __acall__(self, request):
+        key = self.pin_key(request)
+        if request.method not in SAFE_METHODS:
+            response = await self.get_response(request)
+            self.pin(key)
+            return response
+        token = _read_from_replica.set(not self.is_pinned(key))
+        try:
+            return await self.get_response(request)
+        finally:
+            _read_from_replica.reset(token)
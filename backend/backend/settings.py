@@ -30,9 +30,13 @@ INSTALLED_APPS = [
     'users',
     'recipes',
     'api',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
+    'backend.instrumentation.PerformanceMiddleware',
+    'backend.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,6 +85,59 @@ else:
             'PORT': os.getenv('DB_PORT', 5432)
         }
     }
+    # Реплики для чтения: host[:port] через запятую.
+    for index, address in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', '').split(','))
+    ):
+        host, _, port = address.partition(':')
+        DATABASES[f'replica_{index}'] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'PORT': port or DATABASES['default']['PORT'],
+            # Недоступная реплика не должна держать проверку дольше.
+            'OPTIONS': {
+                'connect_timeout': int(
+                    os.getenv('DB_REPLICA_CONNECT_TIMEOUT', '2')
+                ),
+            },
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['backend.replicas.ReplicaRouter']
+# round_robin или least_latency.
+DATABASE_REPLICA_SELECTION = os.getenv(
+    'DB_REPLICA_SELECTION', 'round_robin'
+)
+DATABASE_REPLICA_HEALTH_INTERVAL = 10
+# Сколько секунд после записи клиент читает из основной БД.
+DATABASE_REPLICA_PIN_SECONDS = 5
+
+# Кеш должен быть общим для backend и workers: в нем лежат версии
+# справочников и снимки токенов, которые сбрасываются из любого процесса.
+if DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv(
+                'CACHE_LOCATION', '/var/tmp/foodgram_cache'
+            ),
+            'OPTIONS': {
+                'MAX_ENTRIES': 100000,
+                'CULL_FREQUENCY': 10,
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', 'memcached:11211'),
+            'OPTIONS': {
+                'no_delay': True,
+                'use_pooling': True,
+            },
+        }
+    }
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -121,10 +178,24 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'api.paginations.ApiPagination',
     'PAGE_SIZE': 6,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
+# Браузерный API только для разработки.
+if DEBUG:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] += (
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    )
+
 DJOSER = {
     'HIDE_USERS': False,
     'LOGIN_FIELD': 'email',
@@ -139,3 +210,57 @@ DJOSER = {
 }
 
 DOMAIN_NAME = os.getenv('DOMAIN_NAME', 'localhost')
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
+# Соль коротких ссылок: после генерации ссылок менять нельзя.
+SHORT_LINK_SALT = int(os.getenv('SHORT_LINK_SALT', '0x5F3759DF'), 0)
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False').lower() == 'true'
+# /metrics отдается только адресам из этих сетей или по токену
+# в заголовке Authorization: Bearer <METRICS_TOKEN>.
+METRICS_ALLOWED_NETWORKS = os.getenv(
+    'METRICS_ALLOWED_NETWORKS', '127.0.0.1/32,::1/128'
+).split(',')
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Замеры времени и запросов к БД на каждый HTTP-запрос.
+PERFORMANCE_INSTRUMENTATION = os.getenv(
+    'PERFORMANCE_INSTRUMENTATION', 'False'
+).lower() == 'true'
+PERFORMANCE_QUERY_BUDGET_RAISE = os.getenv(
+    'PERFORMANCE_QUERY_BUDGET_RAISE', 'False'
+).lower() == 'true'
+PERFORMANCE_QUERY_BUDGET_DEFAULT = int(
+    os.getenv('PERFORMANCE_QUERY_BUDGET_DEFAULT', '20')
+)
+# Бюджеты по имени представления с запасом в три запроса на холодный
+# кеш связей пользователя, см. tests/test_query_budget.py.
+PERFORMANCE_QUERY_BUDGETS = {
+    'recipes-list': 8,
+    'recipes-detail': 6,
+    'tags-list': 1,
+    'ingredients-list': 1,
+}
+PERFORMANCE_REPEATED_QUERY_THRESHOLD = 3
+# Допустимый рост p50/p95 и пика памяти в команде benchmark относительно
+# benchmark_baseline.json, доля от базового замера.
+BENCHMARK_THRESHOLD = float(os.getenv('BENCHMARK_THRESHOLD', '0.5'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'backend.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
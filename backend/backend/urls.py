@@ -3,16 +3,18 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path, re_path
 
+from backend.metrics import metrics_view
 from recipes import views
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     re_path('auth/', include('djoser.urls.authtoken')),
     path('api/', include('api.urls')),
     path('api/', include('users.urls')),
     path(
-        's/<str:short_link>/',
+        's/<slug:short_link>/',
         views.redirect_short_link,
         name='redirect-short-link'
     ),
@@ -0,0 +1,40 @@
+import os
+import shutil
+
+# Каталог задается до импорта prometheus_client, чтобы все воркеры
+# писали метрики в файлы и /metrics суммировал их. У каждого мастера
+# свой подкаталог: соседний gunicorn на другом порту не сотрет чужие
+# метрики.
+ROOT = os.environ.get('PROMETHEUS_MULTIPROC_ROOT', '/tmp/prometheus')
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = os.path.join(ROOT, str(os.getpid()))
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def on_starting(server):
+    """Готовит свой каталог метрик и убирает каталоги завершенных
+    мастеров."""
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    for name in os.listdir(ROOT):
+        if name.isdigit() and not is_running(int(name)):
+            shutil.rmtree(os.path.join(ROOT, name), ignore_errors=True)
+
+
+def on_exit(server):
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    """Админ панель фоновых задач."""
+
+    search_fields = ['name']
+    list_filter = ('status', 'name')
+    list_display = (
+        'name', 'status', 'attempts', 'duration', 'run_after', 'worker'
+    )
+    readonly_fields = ('started_at', 'finished_at', 'duration', 'last_error')
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,9 @@
+MAX_LEN_NAME = 255
+MAX_LEN_STATUS = 16
+MAX_LEN_WORKER = 64
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 2
+BACKOFF_MAX = 60 * 60
+JOB_TIMEOUT = 60 * 10
+REQUEUE_INTERVAL = 60
+POLL_INTERVAL = 1.0
@@ -0,0 +1,115 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connections
+
+from jobs import constants
+from jobs.queue import claim, requeue_stale, run
+
+
+logger = logging.getLogger(__name__)
+
+
+def work(name, stop, poll_interval, burst):
+    """Цикл одного потока: забрать задачу, выполнить, повторить."""
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            job = claim(name)
+        except DatabaseError:
+            logger.warning('Не удалось забрать задачу', exc_info=True)
+            stop.wait(poll_interval)
+            continue
+        if job is None:
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+        run(job)
+    connections.close_all()
+
+
+def requeue(stop):
+    """Снимает зависшие задачи раз в REQUEUE_INTERVAL секунд."""
+    while True:
+        close_old_connections()
+        try:
+            requeued, failed = requeue_stale()
+        except DatabaseError:
+            logger.warning('Не удалось проверить зависшие задачи',
+                           exc_info=True)
+        else:
+            if requeued or failed:
+                logger.warning(
+                    'Зависшие задачи: возвращено %s, провалено %s',
+                    requeued, failed
+                )
+        if stop.wait(constants.REQUEUE_INTERVAL):
+            break
+    connections.close_all()
+
+
+def serve(threads, poll_interval, burst):
+    """Процесс воркера с пулом потоков и проверкой зависших задач."""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    prefix = f'{socket.gethostname()}:{os.getpid()}'
+    pool = [
+        threading.Thread(
+            target=work,
+            args=(f'{prefix}:{index}', stop, poll_interval, burst),
+            daemon=True,
+        )
+        for index in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    reaper = threading.Thread(target=requeue, args=(stop,), daemon=True)
+    reaper.start()
+    for thread in pool:
+        thread.join()
+    stop.set()
+    reaper.join()
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркеры фоновых задач из очереди в базе данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument(
+            '--poll-interval', type=float, default=constants.POLL_INTERVAL
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Завершиться, когда очередь опустеет.'
+        )
+
+    def handle(self, *args, **options):
+        connections.close_all()
+        worker_args = (
+            options['threads'], options['poll_interval'], options['burst']
+        )
+        if options['processes'] == 1:
+            serve(*worker_args)
+            return
+        processes = [
+            multiprocessing.Process(target=serve, args=worker_args)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        signal.signal(
+            signal.SIGTERM,
+            lambda *args: [process.terminate() for process in processes]
+        )
+        for process in processes:
+            process.join()
@@ -0,0 +1,143 @@
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from jobs import constants
+from jobs.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(func, *args, run_after=None, max_attempts=None, **kwargs):
+    """Ставит функцию в очередь; аргументы должны сериализоваться в JSON.
+
+    Задача пишется в текущей транзакции и становится видна воркерам
+    вместе с остальными изменениями.
+    """
+    return Job.objects.create(
+        name=f'{func.__module__}.{func.__qualname__}',
+        args=list(args),
+        kwargs=kwargs,
+        run_after=run_after or timezone.now(),
+        max_attempts=max_attempts or constants.MAX_ATTEMPTS,
+    )
+
+
+def requeue_stale():
+    """Снимает задачи, которые выполняются дольше JOB_TIMEOUT.
+
+    Это задачи упавших воркеров и зависшие задачи. Исчерпавшие попытки
+    помечаются ошибкой, остальные возвращаются в очередь. Возвращает
+    число возвращенных и число проваленных задач.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        started_at__lt=now - timedelta(seconds=constants.JOB_TIMEOUT),
+    )
+    error = (
+        f'Задача не завершилась за {constants.JOB_TIMEOUT} с '
+        f'или воркер упал.'
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.Status.FAILED, worker='', finished_at=now,
+        last_error=error,
+    )
+    requeued = stale.update(
+        status=Job.Status.QUEUED, worker='', run_after=now, last_error=error
+    )
+    return requeued, failed
+
+
+def claim(worker):
+    """Забирает следующую задачу через SELECT ... FOR UPDATE SKIP LOCKED.
+
+    На SQLite блокировки строк нет, поэтому захват дополнительно
+    защищен условным UPDATE по статусу.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.Status.QUEUED, run_after__lte=now
+        ).order_by('run_after', 'id').first()
+        if job is None:
+            return None
+        claimed = Job.objects.filter(
+            pk=job.pk, status=Job.Status.QUEUED
+        ).update(
+            status=Job.Status.RUNNING,
+            worker=worker,
+            started_at=now,
+            attempts=F('attempts') + 1,
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def backoff(attempts):
+    return min(constants.BACKOFF_BASE ** attempts, constants.BACKOFF_MAX)
+
+
+def log_timed_out(job, duration):
+    logger.warning(
+        'Задача %s #%s завершилась за %.3f с, уже после снятия по '
+        'таймауту; результат отброшен', job.name, job.pk, duration
+    )
+
+
+def run(job):
+    """Выполняет задачу и сохраняет ее длительность и итог.
+
+    Итог не записывается, если задача за это время снята по таймауту
+    в requeue_stale: ее уже перезапустил или провалил другой воркер.
+    """
+    # Поток нельзя прервать, поэтому таймаут соблюдается через статус.
+    current = Job.objects.filter(
+        pk=job.pk, status=Job.Status.RUNNING, worker=job.worker
+    )
+    started = time.perf_counter()
+    try:
+        import_string(job.name)(*job.args, **job.kwargs)
+    except Exception:
+        duration = time.perf_counter() - started
+        retry = job.attempts < job.max_attempts
+        updated = current.update(
+            status=Job.Status.QUEUED if retry else Job.Status.FAILED,
+            run_after=timezone.now() + timedelta(
+                seconds=backoff(job.attempts)
+            ),
+            finished_at=None if retry else timezone.now(),
+            duration=duration,
+            last_error=traceback.format_exc(),
+        )
+        if not updated:
+            log_timed_out(job, duration)
+            return False
+        logger.exception(
+            'Задача %s #%s упала за %.3f с (попытка %s из %s)',
+            job.name, job.pk, duration, job.attempts, job.max_attempts
+        )
+        return False
+    duration = time.perf_counter() - started
+    updated = current.update(
+        status=Job.Status.DONE,
+        finished_at=timezone.now(),
+        duration=duration,
+        last_error='',
+    )
+    if not updated:
+        log_timed_out(job, duration)
+        return False
+    logger.info(
+        'Задача %s #%s выполнена за %.3f с', job.name, job.pk, duration
+    )
+    return True
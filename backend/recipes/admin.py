@@ -1,7 +1,7 @@
 from django.contrib import admin
-from django.db.models import Count
 
 from recipes.models import Tag, Ingredient, Recipe, RecipeIngredient
+from recipes.shopping_list import set_ingredients
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -21,16 +21,23 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ('tags',)
     list_select_related = ('author',)
     inlines = [RecipeIngredientInline]
-    list_display = ('name', 'author', 'cooking_time', 'favorite_count')
-
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        queryset = queryset.annotate(favorite_count=Count('favoriterecipe'))
-        return queryset
-
-    def favorite_count(self, obj):
-        return obj.favorite_count
-    favorite_count.short_description = 'Количество в избранных'
+    list_display = ('name', 'author', 'cooking_time', 'favorites_count')
+
+    def save_formset(self, request, form, formset, change):
+        """Ингредиенты сохраняются через set_ingredients, чтобы правка
+        в админке обновила списки покупок."""
+        if formset.model is not RecipeIngredient:
+            super().save_formset(request, form, formset, change)
+            return
+        set_ingredients(form.instance, {
+            data['ingredient'].id: data['amount']
+            for data in formset.cleaned_data
+            if data and not data.get('DELETE')
+        })
+        # Нужны админке для записи в историю изменений.
+        formset.new_objects = []
+        formset.changed_objects = []
+        formset.deleted_objects = []
 
 
 class IngredientAdmin(admin.ModelAdmin):
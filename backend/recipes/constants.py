@@ -3,3 +3,32 @@ MAX_LEN_FIELD_INGR = 150
 MAX_LEN_NAME = 256
 MIN_VALIDATORS = 1
 MAX_VALIDATORS = 1000
+INGREDIENT_SEARCH_LIMIT = 50
+SHORT_LINK_MIN_LENGTH = 7
+# Длиннее не бывает, ограничивает и длину ключа в memcached.
+SHORT_LINK_MAX_LENGTH = 32
+SHORT_LINK_LRU_SIZE = 10000
+SHORT_LINK_LRU_TTL = 60
+SHORT_LINK_CACHE_TTL = 60 * 60 * 24
+REFERENCE_MAX_AGE = 60
+REFERENCE_BODY_CACHE_SIZE = 512
+REFERENCE_BODY_CACHE_TTL = 60 * 60
+IMAGE_VARIANTS = {
+    'thumbnail': (160, 160),
+    'card': (480, 480),
+    'full': (1280, 1280),
+}
+IMAGE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+IMAGE_VARIANTS_DIR = 'recipes/variants'
+BULK_RECIPES_LIMIT = 100
+# Поля рецепта, которые пишутся только через UPDATE: счетчики
+# (recipes.counters) и копии изображения (recipes.images).
+RECIPE_UPDATE_ONLY_FIELDS = (
+    'favorites_count', 'shopping_cart_count', 'image_variants'
+)
+# Пачки пересчета списков покупок (recipes.shopping_list.rebuild).
+SHOPPING_LIST_REBUILD_USERS = 500
+SHOPPING_LIST_BATCH_SIZE = 1000
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart
+from users.models import Subscription
+
+
+User = get_user_model()
+
+
+def change(model, pk, field, delta):
+    """Атомарно меняет счетчик, не опуская его ниже нуля."""
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def change_many(model, pks, field, delta):
+    """Атомарно меняет счетчик у нескольких строк одним UPDATE."""
+    queryset = model.objects.filter(pk__in=pks)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        Value(0)
+    )
+
+
+# Счетчики рецепта для каждого списка пользователя.
+RECIPE_LIST_COUNTERS = {
+    FavoriteRecipe: 'favorites_count',
+    ShoppingCart: 'shopping_cart_count',
+}
+
+# Модель со счетчиком, поле счетчика и связь, по которой он считается.
+COUNTERS = (
+    (Recipe, 'favorites_count', FavoriteRecipe, 'recipe'),
+    (Recipe, 'shopping_cart_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscribers_count', Subscription, 'subscribed_to'),
+)
+
+
+def recount(dry_run=False):
+    """Пересчитывает счетчики и возвращает число исправленных строк."""
+    drift = {}
+    for model, field, related_model, related_field in COUNTERS:
+        actual = count_subquery(related_model, related_field)
+        drifted = model.objects.annotate(actual=actual).exclude(
+            **{field: F('actual')}
+        )
+        drift[f'{model._meta.label}.{field}'] = drifted.count()
+        if not dry_run:
+            model.objects.filter(
+                pk__in=drifted.values('pk')
+            ).update(**{field: actual})
+    return drift
@@ -0,0 +1,77 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from jobs.queue import enqueue
+from recipes import constants
+from recipes.models import Recipe
+
+
+def build_variants(name):
+    """Сохраняет копии изображения всех размеров в WebP и JPEG."""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    with default_storage.open(name) as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original.load()
+    variants = {'source': name}
+    for size, dimensions in constants.IMAGE_VARIANTS.items():
+        image = original.copy()
+        image.thumbnail(dimensions, Image.LANCZOS)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        variants[size] = {}
+        for extension, (image_format, options) in (
+            constants.IMAGE_FORMATS.items()
+        ):
+            converted = image
+            if image_format == 'JPEG' and image.mode != 'RGB':
+                converted = image.convert('RGB')
+            buffer = io.BytesIO()
+            converted.save(buffer, image_format, **options)
+            path = default_storage.save(
+                f'{constants.IMAGE_VARIANTS_DIR}/{stem}_{size}.{extension}',
+                ContentFile(buffer.getvalue())
+            )
+            variants[size][extension] = path
+    return variants
+
+
+def delete_variants(variants):
+    """Удаляет файлы копий; исходное изображение не трогает."""
+    for formats in variants.values():
+        if isinstance(formats, dict):
+            for name in formats.values():
+                default_storage.delete(name)
+
+
+def process_recipe_image(recipe_id):
+    """Готовит копии изображения рецепта в фоновой задаче.
+
+    Предыдущие копии удаляются после записи новых. Если изображение
+    сменилось или рецепт удален во время обработки, удаляются новые.
+    """
+    recipe = Recipe.objects.only('image', 'image_variants').filter(
+        pk=recipe_id
+    ).first()
+    if recipe is None:
+        return
+    variants = build_variants(recipe.image.name)
+    with transaction.atomic():
+        # Блокировка исключает гонку двух задач за одни и те же копии.
+        previous = Recipe.objects.select_for_update().filter(
+            pk=recipe_id, image=recipe.image.name
+        ).values_list('image_variants', flat=True).first()
+        if previous is None:
+            delete_variants(variants)
+            return
+        Recipe.objects.filter(pk=recipe_id).update(image_variants=variants)
+    delete_variants(previous)
+
+
+def schedule_image_processing(recipe_id):
+    """Ставит обработку в очередь в той же транзакции, что и рецепт."""
+    enqueue(process_recipe_image, recipe_id)
@@ -0,0 +1,63 @@
+import bisect
+import threading
+
+from recipes.models import Ingredient
+from recipes.versions import get_version
+
+
+class IngredientIndex:
+    """Индекс ингредиентов в памяти процесса для автодополнения.
+
+    Хранит отсортированные названия в нижнем регистре и ищет префикс
+    бинарным поиском. Индекс перестраивается, когда в общем кеше меняется
+    версия справочника.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._keys = []
+        self._items = []
+
+    def build(self, version):
+        items = sorted(
+            Ingredient.objects.values('id', 'name', 'measurement_unit'),
+            key=lambda item: item['name'].lower()
+        )
+        keys = [item['name'].lower() for item in items]
+        self._keys, self._items, self._version = keys, items, version
+
+    def ensure_fresh(self):
+        version = get_version('ingredients')
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self.build(version)
+
+    def search(self, query, limit):
+        """Точное совпадение, затем начало названия, затем вхождение."""
+        self.ensure_fresh()
+        keys, items = self._keys, self._items
+        query = query.strip().lower()
+        if not query:
+            return items[:limit]
+        start = bisect.bisect_left(keys, query)
+        end = start
+        while (
+            end < len(keys)
+            and keys[end].startswith(query)
+            and end - start < limit
+        ):
+            end += 1
+        # Точное совпадение в отсортированном списке стоит первым.
+        results = items[start:end]
+        for index, key in enumerate(keys):
+            if len(results) >= limit:
+                break
+            if query in key and not key.startswith(query):
+                results.append(items[index])
+        return results[:limit]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,37 @@
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from recipes.models import Recipe
+
+
+TABLE = Recipe._meta.db_table
+
+
+def latest_recipe_ids(author_ids, limit):
+    """Подзапрос id не более limit последних рецептов каждого автора.
+
+    В PostgreSQL для каждого автора выполняется LATERAL с LIMIT по
+    индексу (author, -created_at, -id), поэтому читается не больше
+    авторов × limit строк. В SQLite используется ROW_NUMBER().
+    """
+    author_ids = list(author_ids)
+    values = ', '.join(['(%s)'] * len(author_ids))
+    if connection.vendor == 'postgresql':
+        return RawSQL(
+            f'SELECT latest.id FROM (VALUES {values}) author (id) '
+            f'CROSS JOIN LATERAL ('
+            f'SELECT id FROM {TABLE} WHERE author_id = author.id '
+            f'ORDER BY created_at DESC, id DESC LIMIT %s'
+            f') latest',
+            [*author_ids, limit]
+        )
+    placeholders = ', '.join(['%s'] * len(author_ids))
+    return RawSQL(
+        f'SELECT id FROM ('
+        f'SELECT id, ROW_NUMBER() OVER ('
+        f'PARTITION BY author_id ORDER BY created_at DESC, id DESC'
+        f') AS position FROM {TABLE} '
+        f'WHERE author_id IN ({placeholders})'
+        f') ranked WHERE position <= %s',
+        [*author_ids, limit]
+    )
@@ -0,0 +1,58 @@
+from django.db import connection
+
+from recipes.counters import RECIPE_LIST_COUNTERS, change_many
+from recipes.models import Recipe, ShoppingCart, ShoppingListItem
+from recipes.shopping_list import add_recipes
+
+
+def add_many(model, user_id, recipe_ids):
+    """Добавляет рецепты в список пользователя, пропуская уже добавленные.
+
+    Счетчики и список покупок меняются только для реально вставленных
+    строк, поэтому параллельный запрос не приведет к двойному учету.
+    Возвращает множество добавленных id.
+    """
+    if not recipe_ids:
+        return set()
+    values = ', '.join(['(%s, %s)'] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {model._meta.db_table} (user_id, recipe_id) '
+            f'VALUES {values} '
+            f'ON CONFLICT (user_id, recipe_id) DO NOTHING '
+            f'RETURNING recipe_id',
+            [value for recipe_id in recipe_ids
+             for value in (user_id, recipe_id)]
+        )
+        added = [row[0] for row in cursor.fetchall()]
+    change_many(Recipe, added, RECIPE_LIST_COUNTERS[model], 1)
+    if model is ShoppingCart:
+        add_recipes(user_id, added)
+    return set(added)
+
+
+def remove_many(model, user_id, recipe_ids=None):
+    """Удаляет рецепты из списка пользователя, без recipe_ids — все.
+
+    Сигналы удаления не вызываются, счетчики и список покупок
+    уменьшаются по реально удаленным строкам. Возвращает множество
+    удаленных id.
+    """
+    if recipe_ids is not None and not recipe_ids:
+        return set()
+    sql = f'DELETE FROM {model._meta.db_table} WHERE user_id = %s'
+    params = [user_id]
+    if recipe_ids is not None:
+        placeholders = ', '.join(['%s'] * len(recipe_ids))
+        sql += f' AND recipe_id IN ({placeholders})'
+        params += recipe_ids
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} RETURNING recipe_id', params)
+        removed = [row[0] for row in cursor.fetchall()]
+    change_many(Recipe, removed, RECIPE_LIST_COUNTERS[model], -1)
+    if model is ShoppingCart:
+        if recipe_ids is None:
+            ShoppingListItem.objects.filter(user_id=user_id).delete()
+        else:
+            add_recipes(user_id, removed, sign=-1)
+    return set(removed)
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from recipes import constants
+from recipes.models import Recipe
+from recipes.short_links import encode, forget
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет короткие ссылки рецептов детерминированными кодами. '
+        'С --legacy перезаписывает и старые шестисимвольные ссылки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--legacy',
+            action='store_true',
+            help='Перезаписать старые ссылки: опубликованные ранее '
+                 'ссылки перестанут открываться.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        condition = Q(short_link__isnull=True) | Q(short_link='')
+        queryset = Recipe.objects.annotate(
+            short_link_length=Length('short_link')
+        )
+        if options['legacy']:
+            condition |= Q(
+                short_link_length__lt=constants.SHORT_LINK_MIN_LENGTH
+            )
+        recipes = queryset.filter(condition).only('id', 'short_link')
+        updated = 0
+        batch = []
+        for recipe in recipes.iterator(chunk_size=batch_size):
+            if recipe.short_link:
+                forget(recipe.short_link)
+            recipe.short_link = encode(recipe.id)
+            batch.append(recipe)
+            if len(batch) >= batch_size:
+                updated += self.flush(batch, batch_size)
+        updated += self.flush(batch, batch_size)
+        self.stdout.write(f'Обновлено коротких ссылок: {updated}')
+
+    @staticmethod
+    def flush(batch, batch_size):
+        with transaction.atomic():
+            Recipe.objects.bulk_update(
+                batch, ['short_link'], batch_size=batch_size
+            )
+        count = len(batch)
+        batch.clear()
+        return count
@@ -0,0 +1,261 @@
+import csv
+import io
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from recipes import constants
+from recipes.counters import recount
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from recipes.shopping_list import rebuild
+from recipes.short_links import encode
+from users.models import Subscription, User
+
+
+ADJECTIVES = (
+    'Домашний', 'Быстрый', 'Пряный', 'Летний', 'Зимний', 'Бабушкин',
+    'Острый', 'Нежный', 'Постный', 'Праздничный', 'Сырный', 'Овощной',
+)
+DISHES = (
+    'суп', 'салат', 'пирог', 'плов', 'омлет', 'рагу', 'соус', 'гуляш',
+    'борщ', 'десерт', 'смузи', 'запеканка', 'паста', 'каша', 'бургер',
+)
+RECIPE_IMAGE = 'recipes/generated.jpg'
+DATE_SPREAD = timedelta(days=365)
+
+
+def skewed(rng, size, power):
+    """Индекс от 0 до size с перекосом к началу, как у популярности."""
+    return int(size * rng.random() ** power)
+
+
+def sample_skewed(rng, size, count, power):
+    """Различные индексы с перекосом к началу."""
+    count = min(count, size if power == 1 else size // 2)
+    chosen = set()
+    while len(chosen) < count:
+        chosen.add(skewed(rng, size, power))
+    return chosen
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетические данные для нагрузочных тестов: '
+        'пользователей, рецепты, избранное, корзины и подписки. '
+        'Справочники ингредиентов и тегов должны быть загружены заранее.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--favorites',
+            type=int,
+            default=20,
+            help='Среднее число рецептов в избранном пользователя.'
+        )
+        parser.add_argument(
+            '--carts',
+            type=int,
+            default=5,
+            help='Среднее число рецептов в корзине пользователя.'
+        )
+        parser.add_argument(
+            '--subscriptions',
+            type=int,
+            default=10,
+            help='Среднее число подписок пользователя.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='load')
+        parser.add_argument('--password', default='password')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)
+        )
+        self.tag_ids = list(
+            Tag.objects.order_by('id').values_list('id', flat=True)
+        )
+        if not self.ingredient_ids or not self.tag_ids:
+            raise CommandError(
+                'Нет ингредиентов или тегов, выполните load_reference_data.'
+            )
+        if options['users'] < 2 or options['recipes'] < 1:
+            raise CommandError('Нужно минимум 2 пользователя и 1 рецепт.')
+        self.now = timezone.now()
+        self.users = self.id_range(User, options['users'])
+        self.recipes = self.id_range(Recipe, options['recipes'])
+
+        self.step('Пользователи', self.generate_users(
+            options['prefix'], make_password(options['password'])
+        ))
+        self.step('Рецепты', self.generate_recipes())
+        self.reset_sequences()
+        self.step('Избранное', self.generate_relations(
+            FavoriteRecipe, options['favorites']
+        ))
+        self.step('Корзины', self.generate_relations(
+            ShoppingCart, options['carts']
+        ))
+        self.step('Подписки', self.generate_subscriptions(
+            options['subscriptions']
+        ))
+        with transaction.atomic():
+            recount()
+        rebuild()
+        self.stdout.write('Счетчики и списки покупок пересчитаны.')
+
+    @staticmethod
+    def id_range(model, count):
+        """Явные id новых строк, чтобы не перечитывать их после вставки."""
+        first = (model.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        return range(first, first + count)
+
+    def step(self, title, objects):
+        """Вставляет объекты пачками, каждая пачка в своей транзакции."""
+        started = time.perf_counter()
+        inserted = 0
+        objects = iter(objects)
+        while True:
+            batch = list(itertools.islice(objects, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                batch.sort(key=lambda obj: type(obj).__name__)
+                for model, group in itertools.groupby(batch, key=type):
+                    self.insert(model, list(group))
+            inserted += len(batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{title}: {inserted} строк за {elapsed:.1f} с '
+            f'({inserted / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+
+    @staticmethod
+    def insert(model, objects):
+        if connection.vendor != 'postgresql':
+            model.objects.bulk_create(objects)
+            return
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not (field.primary_key and objects[0].pk is None)
+        ]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objects:
+            row = []
+            for field in fields:
+                value = field.get_prep_value(getattr(obj, field.attname))
+                row.append(r'\N' if value is None else value)
+            writer.writerow(row)
+        buffer.seek(0)
+        columns = ', '.join(field.column for field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {model._meta.db_table} ({columns}) '
+                f"FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
+
+    def reset_sequences(self):
+        """После вставки с явными id выравнивает счетчики id в PostgreSQL."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Recipe]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def created_at(self):
+        return self.now - DATE_SPREAD * self.rng.random()
+
+    def generate_users(self, prefix, password):
+        for user_id in self.users:
+            yield User(
+                id=user_id,
+                username=f'{prefix}_{user_id}',
+                email=f'{prefix}_{user_id}@example.com',
+                first_name='Тест',
+                last_name=f'Пользователь {user_id}',
+                password=password,
+                date_joined=self.created_at(),
+            )
+
+    def generate_recipes(self):
+        """Рецепты с ингредиентами и тегами.
+
+        Немногие авторы пишут большую часть рецептов, популярные
+        ингредиенты встречаются чаще редких.
+        """
+        rng = self.rng
+        tag_through = Recipe.tags.through
+        for recipe_id in self.recipes:
+            yield Recipe(
+                id=recipe_id,
+                author_id=self.users[skewed(rng, len(self.users), 3)],
+                name=f'{rng.choice(ADJECTIVES)} {rng.choice(DISHES)} '
+                     f'№{recipe_id}',
+                image=RECIPE_IMAGE,
+                text=' '.join(rng.choices(DISHES, k=rng.randint(10, 60))),
+                cooking_time=min(
+                    int(rng.lognormvariate(3.3, 0.6)) + 1,
+                    constants.MAX_VALIDATORS
+                ),
+                created_at=self.created_at(),
+                short_link=encode(recipe_id),
+            )
+        for recipe_id in self.recipes:
+            for index in sample_skewed(
+                rng, len(self.ingredient_ids), rng.randint(3, 12), 2
+            ):
+                yield RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=self.ingredient_ids[index],
+                    amount=rng.randint(
+                        constants.MIN_VALIDATORS, constants.MAX_VALIDATORS
+                    ),
+                )
+            for index in sample_skewed(
+                rng, len(self.tag_ids), rng.randint(1, 3), 1
+            ):
+                yield tag_through(
+                    recipe_id=recipe_id, tag_id=self.tag_ids[index]
+                )
+
+    def generate_relations(self, model, average):
+        """Избранное или корзина: популярные рецепты выбирают чаще."""
+        rng = self.rng
+        for user_id in self.users:
+            count = int(rng.expovariate(1 / average)) if average else 0
+            for index in sample_skewed(rng, len(self.recipes), count, 2):
+                yield model(user_id=user_id, recipe_id=self.recipes[index])
+
+    def generate_subscriptions(self, average):
+        """Подписки: на активных авторов подписываются чаще."""
+        rng = self.rng
+        for user_id in self.users:
+            count = int(rng.expovariate(1 / average)) if average else 0
+            for index in sample_skewed(rng, len(self.users), count, 3):
+                if self.users[index] != user_id:
+                    yield Subscription(
+                        user_id=user_id, subscribed_to_id=self.users[index]
+                    )
@@ -0,0 +1,145 @@
+import csv
+import io
+import itertools
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.models import Ingredient, Tag
+from recipes.versions import bump_version
+
+
+MODELS = {
+    'recipes.ingredient': Ingredient,
+    'recipes.tag': Tag,
+}
+DEFAULT_PATHS = (
+    settings.BASE_DIR.parent / 'data' / 'ingredients.csv',
+    settings.BASE_DIR / 'fixtures.json',
+)
+
+
+def read_csv(path):
+    """Ингредиенты из CSV: название, единица измерения."""
+    with open(path, encoding='utf-8', newline='') as file:
+        for row in csv.reader(file):
+            if len(row) >= 2:
+                yield Ingredient, {
+                    'name': row[0].strip(),
+                    'measurement_unit': row[1].strip(),
+                }
+
+
+def read_json(path):
+    """Фикстура Django или список ингредиентов в JSON."""
+    with open(path, encoding='utf-8') as file:
+        records = json.load(file)
+    for record in records:
+        if 'model' not in record:
+            yield Ingredient, record
+        elif record['model'] in MODELS:
+            yield MODELS[record['model']], record['fields']
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает справочники ингредиентов и тегов из CSV/JSON. '
+        'Уже существующие записи пропускаются, повторный запуск безопасен.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='*',
+            type=Path,
+            help='CSV или JSON файлы, по умолчанию data/ingredients.csv '
+                 'и fixtures.json.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or [
+            path for path in DEFAULT_PATHS if path.exists()
+        ]
+        for path in paths:
+            reader = READERS.get(path.suffix.lower())
+            if reader is None:
+                raise CommandError(f'Неподдерживаемый формат: {path}')
+            if not path.exists():
+                raise CommandError(f'Файл не найден: {path}')
+            started = time.perf_counter()
+            read, inserted = self.load(reader(path), options['batch_size'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{path.name}: прочитано {read}, добавлено {inserted} '
+                f'за {elapsed:.3f} с ({read / max(elapsed, 1e-6):.0f} '
+                f'строк/с)'
+            )
+        bump_version('ingredients')
+        bump_version('tags')
+
+    def load(self, records, batch_size):
+        read = inserted = 0
+        records = iter(records)
+        with transaction.atomic():
+            while True:
+                batch = list(itertools.islice(records, batch_size))
+                if not batch:
+                    break
+                read += len(batch)
+                for model, group in itertools.groupby(
+                    batch, key=lambda record: record[0]
+                ):
+                    rows = [fields for _, fields in group]
+                    if connection.vendor == 'postgresql':
+                        inserted += self.copy(model, rows)
+                    else:
+                        inserted += self.bulk_create(model, rows)
+        return read, inserted
+
+    @staticmethod
+    def copy(model, rows):
+        """COPY во временную таблицу и INSERT ... ON CONFLICT DO NOTHING."""
+        table = model._meta.db_table
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[column] for column in columns])
+        buffer.seek(0)
+        column_list = ', '.join(columns)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS tmp_{table} '
+                f'(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP'
+            )
+            cursor.execute(f'TRUNCATE tmp_{table}')
+            cursor.copy_expert(
+                f'COPY tmp_{table} ({column_list}) FROM STDIN WITH CSV',
+                buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {table} ({column_list}) '
+                f'SELECT DISTINCT ON ({columns[0]}) {column_list} '
+                f'FROM tmp_{table} ON CONFLICT DO NOTHING'
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def bulk_create(model, rows):
+        """Запасной вариант для SQLite: пакетная вставка без конфликтов."""
+        before = model.objects.count()
+        model.objects.bulk_create(
+            [model(**row) for row in rows], ignore_conflicts=True
+        )
+        return model.objects.count() - before
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import process_recipe_image
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Готовит уменьшенные копии изображений рецептов, у которых их нет '
+        'или они устарели. С --all пересоздает копии для всех рецептов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='').only(
+            'id', 'image', 'image_variants'
+        )
+        processed = 0
+        for recipe in recipes.iterator():
+            variants = recipe.image_variants
+            if (
+                options['all']
+                or recipe.image.name != variants.get('source')
+                or len(variants) == 1
+            ):
+                process_recipe_image(recipe.id)
+                processed += 1
+        self.stdout.write(f'Обработано изображений: {processed}')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.shopping_list import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет суммы списков покупок с пересчетом из корзин '
+        'и заполняет таблицу заново при расхождениях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, с ненулевым кодом выхода.'
+        )
+
+    def handle(self, *args, **options):
+        drift = rebuild(dry_run=options['dry_run'])
+        if drift and options['dry_run']:
+            raise CommandError(f'Расхождений: {drift}')
+        self.stdout.write(f'Расхождений: {drift}')
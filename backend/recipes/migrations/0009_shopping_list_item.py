@@ -0,0 +1,49 @@
+# Generated by Django 3.2 on 2026-10-18 03:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F, Sum
+
+
+def fill_shopping_lists(apps, schema_editor):
+    recipe_ingredient = apps.get_model('recipes', 'RecipeIngredient')
+    shopping_list_item = apps.get_model('recipes', 'ShoppingListItem')
+    shopping_list_item.objects.bulk_create(
+        shopping_list_item(
+            user_id=row['user'],
+            ingredient_id=row['ingredient'],
+            amount=row['total'],
+        )
+        for row in recipe_ingredient.objects.filter(
+            recipe__shoppingcart__isnull=False
+        ).values(
+            'ingredient', user=F('recipe__shoppingcart__user')
+        ).annotate(total=Sum('amount')).order_by().iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_auto_20261018_0310'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.BigIntegerField(default=0)),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recipes.ingredient')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Позиция списка покупок',
+                'verbose_name_plural': 'Список покупок',
+                'unique_together': {('user', 'ingredient')},
+            },
+        ),
+        migrations.RunPython(fill_shopping_lists, migrations.RunPython.noop),
+    ]
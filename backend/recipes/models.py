@@ -1,10 +1,10 @@
-import uuid
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
 from recipes import constants
+from recipes.short_links import encode
 
 User = get_user_model()
 
@@ -68,6 +68,7 @@ class Recipe(models.Model):
         related_name='recipes'
     )
     image = models.ImageField(upload_to='recipes/', null=False, blank=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     text = models.TextField()
     cooking_time = models.PositiveIntegerField(
         null=False,
@@ -84,18 +85,49 @@ class Recipe(models.Model):
         blank=True,
         null=True
     )
+    favorites_count = models.PositiveIntegerField(
+        'Количество в избранных', default=0, editable=False
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        'Количество в корзинах', default=0, editable=False
+    )
 
     def __str__(self):
         return self.name
 
-    def save(self, *args, **kwargs):
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        """Обычное сохранение не пишет поля, которые меняются только
+        атомарными UPDATE, иначе устаревшие значения затрут их."""
+        if update_fields is None and not force_insert and (
+            not self._state.adding
+        ):
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in constants.RECIPE_UPDATE_ONLY_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(force_insert, force_update, using, update_fields)
         if not self.short_link:
-            short_id = str(uuid.uuid4())[:6]
-            self.short_link = f"{short_id}"
-        super().save(*args, **kwargs)
+            self.short_link = encode(self.pk)
+            Recipe.objects.filter(pk=self.pk).update(
+                short_link=self.short_link
+            )
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='recipe_created_at_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-created_at', '-id'],
+                name='recipe_author_created_at_idx'
+            ),
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
@@ -156,3 +188,23 @@ class ShoppingCart(BaseRecipeRelationship):
         ordering = ['recipe']
         verbose_name = 'Корзина'
         verbose_name_plural = 'Корзины'
+
+
+class ShoppingListItem(models.Model):
+    """Сумма ингредиента по всем рецептам в корзине пользователя.
+
+    Поддерживается инкрементально, см. recipes.shopping_list.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list'
+    )
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
+    amount = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'ingredient')
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Список покупок'
@@ -0,0 +1,104 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+
+PG_CONFIG = 'pg_catalog.russian'
+
+# Django пересоздает таблицу SQLite при изменении схемы и теряет триггеры,
+# поэтому они создаются заново после каждой миграции.
+SQLITE_INSTALL = (
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts USING fts5(
+        name, text,
+        content='recipes_recipe',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_insert
+    AFTER INSERT ON recipes_recipe BEGIN
+        INSERT INTO recipes_recipe_fts(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_delete
+    AFTER DELETE ON recipes_recipe BEGIN
+        INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_update
+    AFTER UPDATE OF name, text ON recipes_recipe BEGIN
+        INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO recipes_recipe_fts(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts) VALUES ('rebuild')",
+)
+
+
+def execute(db_connection, statements):
+    with db_connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install_sqlite(db_connection):
+    """Полнотекстовый индекс FTS5 для SQLite в режиме DEBUG."""
+    if db_connection.vendor == 'sqlite':
+        execute(db_connection, SQLITE_INSTALL)
+
+
+def get_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def search(queryset, query):
+    """Рецепты, подходящие под запрос, по убыванию релевантности.
+
+    Последнее слово ищется по префиксу для поиска по мере набора.
+    """
+    terms = get_terms(query)
+    if not terms:
+        return queryset
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+        match = RawSQL(
+            f"recipes_recipe.search_vector @@ to_tsquery('{PG_CONFIG}', %s)",
+            [tsquery],
+            output_field=BooleanField()
+        )
+        rank = RawSQL(
+            'ts_rank(recipes_recipe.search_vector, '
+            f"to_tsquery('{PG_CONFIG}', %s))",
+            [tsquery],
+            output_field=FloatField()
+        )
+    else:
+        fts_query = ' '.join(
+            [f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*']
+        )
+        match = RawSQL(
+            'recipes_recipe.id IN (SELECT rowid FROM recipes_recipe_fts '
+            'WHERE recipes_recipe_fts MATCH %s)',
+            [fts_query],
+            output_field=BooleanField()
+        )
+        rank = RawSQL(
+            '(SELECT -bm25(recipes_recipe_fts, 10.0, 1.0) '
+            'FROM recipes_recipe_fts WHERE recipes_recipe_fts MATCH %s '
+            'AND rowid = recipes_recipe.id)',
+            [fts_query],
+            output_field=FloatField()
+        )
+    return queryset.annotate(
+        search_match=match, search_rank=rank
+    ).filter(search_match=True).order_by('-search_rank', '-created_at', '-id')
@@ -0,0 +1,210 @@
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from recipes import constants
+from recipes.models import (
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem
+)
+
+
+User = get_user_model()
+TABLE = ShoppingListItem._meta.db_table
+UPSERT = (
+    f'INSERT INTO {TABLE} (user_id, ingredient_id, amount) {{select}} '
+    f'ON CONFLICT (user_id, ingredient_id) '
+    f'DO UPDATE SET amount = {TABLE}.amount + excluded.amount '
+    f'RETURNING id, amount'
+)
+
+
+def upsert(select, params):
+    """Прибавляет количества и удаляет обнулившиеся позиции.
+
+    Удаляются только строки, измененные этим запросом, без обхода
+    позиций других пользователей.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT.format(select=select), params)
+        empty = [item_id for item_id, amount in cursor.fetchall()
+                 if amount <= 0]
+    if empty:
+        ShoppingListItem.objects.filter(
+            id__in=empty, amount__lte=0
+        ).delete()
+
+
+def add_recipes(user_id, recipe_ids, sign=1):
+    """Прибавляет (sign=1) или вычитает (sign=-1) ингредиенты рецептов
+    из списка покупок пользователя одним запросом."""
+    if not recipe_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    upsert(
+        f'SELECT %s, ingredient_id, SUM(amount) * %s '
+        f'FROM {RecipeIngredient._meta.db_table} '
+        f'WHERE recipe_id IN ({placeholders}) '
+        f'GROUP BY ingredient_id',
+        [user_id, sign, *recipe_ids]
+    )
+
+
+def change_recipe(recipe_id, deltas):
+    """Применяет изменения количеств ингредиентов рецепта
+    ко всем корзинам, где он лежит.
+
+    deltas: {ingredient_id: изменение количества}.
+    """
+    deltas = {
+        ingredient_id: delta for ingredient_id, delta in deltas.items()
+        if delta
+    }
+    if not deltas:
+        return
+    values = ', '.join(['(%s, %s)'] * len(deltas))
+    upsert(
+        f'SELECT cart.user_id, delta.column1, delta.column2 '
+        f'FROM {ShoppingCart._meta.db_table} cart '
+        f'CROSS JOIN (VALUES {values}) delta '
+        f'WHERE cart.recipe_id = %s',
+        [*(value for item in deltas.items() for value in item), recipe_id]
+    )
+
+
+def set_ingredients(recipe, amounts):
+    """Применяет к ингредиентам рецепта только изменения.
+
+    amounts: {ingredient_id: количество} — новый состав рецепта.
+    Новые строки вставляются, изменившиеся количества обновляются
+    одним bulk_update, удаленные ингредиенты удаляются. Разница
+    переносится в списки покупок пользователей с рецептом в корзине.
+    Строка рецепта блокируется до чтения ингредиентов, поэтому
+    параллельные правки применяются по очереди и не сбивают суммы.
+    """
+    Recipe.objects.select_for_update().get(pk=recipe.pk)
+    existing = {
+        recipe_ingredient.ingredient_id: recipe_ingredient
+        for recipe_ingredient in RecipeIngredient.objects.filter(
+            recipe=recipe
+        )
+    }
+    # Изменения для сумм в корзинах, до правки existing.
+    deltas = {
+        ingredient_id: amount - getattr(
+            existing.get(ingredient_id), 'amount', 0
+        )
+        for ingredient_id, amount in amounts.items()
+    }
+    for ingredient_id, recipe_ingredient in existing.items():
+        if ingredient_id not in amounts:
+            deltas[ingredient_id] = -recipe_ingredient.amount
+    removed = [
+        recipe_ingredient.id
+        for ingredient_id, recipe_ingredient in existing.items()
+        if ingredient_id not in amounts
+    ]
+    changed = []
+    added = []
+    for ingredient_id, amount in amounts.items():
+        recipe_ingredient = existing.get(ingredient_id)
+        if recipe_ingredient is None:
+            added.append(RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            ))
+        elif recipe_ingredient.amount != amount:
+            recipe_ingredient.amount = amount
+            changed.append(recipe_ingredient)
+    if removed:
+        RecipeIngredient.objects.filter(id__in=removed).delete()
+    if changed:
+        RecipeIngredient.objects.bulk_update(changed, ['amount'])
+    if added:
+        RecipeIngredient.objects.bulk_create(added)
+    change_recipe(recipe.id, deltas)
+
+
+def lock():
+    """Блокирует таблицу от параллельных изменений до конца транзакции.
+
+    Чтение не блокируется. В SQLite пишущие транзакции и так идут
+    по одной.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {TABLE} IN EXCLUSIVE MODE')
+
+
+def expected_totals(user_ids):
+    """Суммы пользователей, посчитанные заново из корзин
+    и ингредиентов рецептов."""
+    return {
+        (row['recipe__shoppingcart__user'], row['ingredient']): row['total']
+        for row in RecipeIngredient.objects.filter(
+            recipe__shoppingcart__user__in=user_ids
+        ).values(
+            'recipe__shoppingcart__user', 'ingredient'
+        ).annotate(total=Sum('amount')).order_by()
+    }
+
+
+def rebuild_users(user_ids, dry_run=False):
+    """Сверяет позиции пользователей с пересчетом, возвращает число
+    расхождений.
+
+    Без dry_run списки пользователей с расхождениями записываются
+    заново.
+    """
+    expected = expected_totals(user_ids)
+    actual = {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in
+        ShoppingListItem.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'ingredient_id', 'amount'
+        )
+    }
+    wrong = {
+        key for key in expected.keys() | actual.keys()
+        if expected.get(key) != actual.get(key)
+    }
+    if wrong and not dry_run:
+        users = {user_id for user_id, _ in wrong}
+        ShoppingListItem.objects.filter(user_id__in=users).delete()
+        ShoppingListItem.objects.bulk_create(
+            (
+                ShoppingListItem(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=amount
+                )
+                for (user_id, ingredient_id), amount in expected.items()
+                if user_id in users
+            ),
+            batch_size=constants.SHOPPING_LIST_BATCH_SIZE,
+        )
+    return len(wrong)
+
+
+def rebuild(dry_run=False):
+    """Сверяет таблицу с пересчетом, возвращает число расхождений.
+
+    Пользователи обходятся пачками, каждая в своей транзакции, поэтому
+    память не зависит от размера таблицы. Без dry_run пачка
+    исправляется под блокировкой таблицы: корзины, измененные
+    параллельно, дождутся ее и применят свои изменения поверх.
+    """
+    drift = 0
+    last_id = 0
+    while True:
+        user_ids = list(
+            User.objects.filter(id__gt=last_id).order_by('id').values_list(
+                'id', flat=True
+            )[:constants.SHOPPING_LIST_REBUILD_USERS]
+        )
+        if not user_ids:
+            return drift
+        last_id = user_ids[-1]
+        with transaction.atomic():
+            if not dry_run:
+                lock()
+            drift += rebuild_users(user_ids, dry_run)
@@ -0,0 +1,65 @@
+import string
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+
+from backend.lru import LRUCache
+from backend.metrics import record_cache
+from recipes import constants
+
+
+ALPHABET = string.digits + string.ascii_letters
+# Нечетный множитель обратим по модулю 2**40: разные id дают разные коды.
+MULTIPLIER = 0x9E3779B1
+MODULUS = 2 ** 40
+CACHE_KEY = 'short_link:{}'
+
+local_cache = LRUCache(
+    maxsize=constants.SHORT_LINK_LRU_SIZE,
+    ttl=constants.SHORT_LINK_LRU_TTL
+)
+
+
+def encode(recipe_id):
+    """Короткая ссылка из id рецепта: base62 от перемешанного id с солью.
+
+    Код не короче SHORT_LINK_MIN_LENGTH символов, поэтому не пересекается
+    со старыми шестисимвольными ссылками.
+    """
+    number = (recipe_id * MULTIPLIER % MODULUS) ^ settings.SHORT_LINK_SALT
+    chars = []
+    while number:
+        number, remainder = divmod(number, len(ALPHABET))
+        chars.append(ALPHABET[remainder])
+    code = ''.join(reversed(chars))
+    return code.rjust(constants.SHORT_LINK_MIN_LENGTH, ALPHABET[0])
+
+
+def resolve(short_link):
+    """Id рецепта по короткой ссылке: кеш процесса, общий кеш, затем БД."""
+    if len(short_link) > constants.SHORT_LINK_MAX_LENGTH:
+        return None
+    recipe_id = local_cache.get(short_link)
+    record_cache('short_links_local', recipe_id is not None)
+    if recipe_id is not None:
+        return recipe_id
+    key = CACHE_KEY.format(short_link)
+    recipe_id = cache.get(key)
+    record_cache('short_links', recipe_id is not None)
+    if recipe_id is None:
+        recipe = apps.get_model('recipes', 'Recipe')
+        recipe_id = recipe.objects.filter(
+            short_link=short_link
+        ).values_list('id', flat=True).first()
+        if recipe_id is None:
+            return None
+        cache.set(key, recipe_id, constants.SHORT_LINK_CACHE_TTL)
+    local_cache.set(short_link, recipe_id)
+    return recipe_id
+
+
+def forget(short_link):
+    """Убирает ссылку удаленного рецепта из кешей."""
+    local_cache.delete(short_link)
+    cache.delete(CACHE_KEY.format(short_link))
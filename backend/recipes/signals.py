@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from recipes.counters import change
+from recipes.images import delete_variants, schedule_image_processing
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tag
+)
+from recipes.shopping_list import add_recipes
+from recipes.short_links import forget
+from recipes.versions import bump_version
+
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def bump_ingredients_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version('ingredients'))
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def bump_tags_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version('tags'))
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_short_link(sender, instance, **kwargs):
+    if instance.short_link:
+        transaction.on_commit(lambda: forget(instance.short_link))
+
+
+@receiver(post_save, sender=Recipe)
+def process_recipe_image(sender, instance, created, **kwargs):
+    if (
+        instance.image
+        and instance.image.name != instance.image_variants.get('source')
+    ):
+        previous = None if created else Recipe.objects.filter(
+            pk=instance.pk
+        ).values_list('image_variants', flat=True).first()
+        # Источник запоминается сразу, чтобы сохранения до окончания
+        # обработки не ставили задачу повторно.
+        instance.image_variants = {'source': instance.image.name}
+        Recipe.objects.filter(pk=instance.pk).update(
+            image_variants=instance.image_variants
+        )
+        schedule_image_processing(instance.id)
+        if previous:
+            transaction.on_commit(lambda: delete_variants(previous))
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_image_variants(sender, instance, **kwargs):
+    variants = instance.image_variants
+    transaction.on_commit(lambda: delete_variants(variants))
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        change(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    change(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+def increment_favorites_count(sender, instance, created, **kwargs):
+    if created:
+        change(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=FavoriteRecipe)
+def decrement_favorites_count(sender, instance, **kwargs):
+    change(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def increment_shopping_cart_count(sender, instance, created, **kwargs):
+    if created:
+        change(Recipe, instance.recipe_id, 'shopping_cart_count', 1)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_shopping_cart_count(sender, instance, **kwargs):
+    change(Recipe, instance.recipe_id, 'shopping_cart_count', -1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        add_recipes(instance.user_id, [instance.recipe_id])
+
+
+# До удаления: при каскаде от рецепта его ингредиенты еще на месте.
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    add_recipes(instance.user_id, [instance.recipe_id], sign=-1)
@@ -0,0 +1,24 @@
+import time
+import uuid
+
+from django.core.cache import cache
+
+
+CACHE_KEY = 'reference_version:{}'
+
+
+def get_version(name):
+    """Версия справочника из общего кеша: (метка, время изменения)."""
+    key = CACHE_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, (uuid.uuid4().hex, int(time.time())), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Меняет версию справочника во всех процессах после записи."""
+    cache.set(
+        CACHE_KEY.format(name), (uuid.uuid4().hex, int(time.time())), None
+    )
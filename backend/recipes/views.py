@@ -1,8 +1,12 @@
-from django.shortcuts import get_object_or_404, redirect
-from .models import Recipe
+from django.http import Http404
+from django.shortcuts import redirect
+
+from recipes.short_links import resolve
 
 
 def redirect_short_link(request, short_link):
-    recipe = get_object_or_404(Recipe, short_link=short_link)
-    frontend_url = f"/recipes/{recipe.id}/"
+    recipe_id = resolve(short_link)
+    if recipe_id is None:
+        raise Http404
+    frontend_url = f"/recipes/{recipe_id}/"
     return redirect(frontend_url)
@@ -0,0 +1,145 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.counters import recount
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+    Tag
+)
+
+
+User = get_user_model()
+
+RECIPES_COUNT = 20
+MISSING_ID = 10 ** 6
+
+
+class BulkListsTest(TestCase):
+    """Пакетное изменение избранного и корзины, очистка корзины."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.user = [
+            User.objects.create(
+                username=f'bulk_user_{index}',
+                email=f'bulk_user_{index}@example.com',
+            )
+            for index in range(2)
+        ]
+        tag = Tag.objects.create(name='bulk', slug='bulk')
+        ingredient = Ingredient.objects.create(
+            name='bulk', measurement_unit='г'
+        )
+        cls.recipes = []
+        for index in range(RECIPES_COUNT):
+            recipe = Recipe.objects.create(
+                author=cls.author,
+                name=f'bulk-{index}',
+                image='recipes/bulk.png',
+                text='bulk',
+                cooking_time=1,
+            )
+            recipe.tags.set([tag])
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=1
+            )
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, list_name, **data):
+        response = self.client.post(
+            f'/api/recipes/{list_name}/bulk/', data, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [
+            (result['id'], result['status'])
+            for result in response.data['results']
+        ]
+
+    def assertCountersConsistent(self):
+        self.assertFalse(any(recount(dry_run=True).values()))
+
+    def test_statuses(self):
+        first, second, third = (recipe.id for recipe in self.recipes[:3])
+        self.assertEqual(
+            self.bulk('favorite', add=[first, second, MISSING_ID]),
+            [
+                (first, 'added'),
+                (second, 'added'),
+                (MISSING_ID, 'not_found'),
+            ]
+        )
+        self.assertEqual(
+            self.bulk(
+                'favorite', add=[first], remove=[second, third, MISSING_ID]
+            ),
+            [
+                (first, 'already_added'),
+                (second, 'removed'),
+                (third, 'not_in_list'),
+                (MISSING_ID, 'not_found'),
+            ]
+        )
+        self.assertEqual(
+            set(FavoriteRecipe.objects.filter(
+                user=self.user
+            ).values_list('recipe_id', flat=True)),
+            {first}
+        )
+        self.assertCountersConsistent()
+
+    def test_idempotent(self):
+        ids = [recipe.id for recipe in self.recipes[:5]]
+        self.bulk('shopping_cart', add=ids)
+        self.assertEqual(
+            self.bulk('shopping_cart', add=ids + ids[:2]),
+            [(recipe_id, 'already_added') for recipe_id in ids]
+        )
+        self.assertEqual(
+            Recipe.objects.get(pk=ids[0]).shopping_cart_count, 1
+        )
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=self.user).amount, 5
+        )
+        self.bulk('shopping_cart', remove=ids)
+        self.assertEqual(
+            self.bulk('shopping_cart', remove=ids),
+            [(recipe_id, 'not_in_list') for recipe_id in ids]
+        )
+        self.assertEqual(
+            Recipe.objects.get(pk=ids[0]).shopping_cart_count, 0
+        )
+        self.assertFalse(
+            ShoppingListItem.objects.filter(user=self.user).exists()
+        )
+        self.assertCountersConsistent()
+
+    def test_clear_shopping_cart(self):
+        self.bulk(
+            'shopping_cart', add=[recipe.id for recipe in self.recipes]
+        )
+        # DELETE корзины, счетчики, список покупок и две операции
+        # с точкой сохранения транзакции.
+        with self.assertNumQueries(5):
+            response = self.client.delete('/api/recipes/shopping_cart/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ShoppingCart.objects.filter(user=self.user).exists())
+        self.assertFalse(
+            ShoppingListItem.objects.filter(user=self.user).exists()
+        )
+        self.assertEqual(
+            Recipe.objects.filter(shopping_cart_count__gt=0).count(), 0
+        )
+        self.assertCountersConsistent()
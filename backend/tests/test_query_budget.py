@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag
+)
+from users.models import Subscription
+
+
+User = get_user_model()
+
+RECIPES_COUNT = 30
+INGREDIENTS_PER_RECIPE = 5
+
+# Число запросов при прогретом кеше связей пользователя (users.relations),
+# холодный кеш добавляет три запроса один раз.
+QUERY_BUDGETS = (
+    ('/api/recipes/', 4),
+    (f'/api/recipes/?limit={RECIPES_COUNT}', 4),
+    ('/api/recipes/?pagination=cursor', 3),
+    ('/api/recipes/?tags=budget-0&tags=budget-1', 5),
+    ('/api/recipes/?is_favorited=1&is_in_shopping_cart=1', 4),
+    ('/api/recipes/?search=budg', 4),
+    ('/api/recipes/{recipe_id}/', 3),
+)
+
+
+class RecipeQueryBudgetTest(TestCase):
+    """Эндпоинты рецептов выполняют постоянное число запросов к БД."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            User.objects.create(
+                username=f'budget_user_{index}',
+                email=f'budget_user_{index}@example.com',
+            )
+            for index in range(3)
+        ]
+        tags = [
+            Tag.objects.create(name=f'budget-{index}', slug=f'budget-{index}')
+            for index in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'budget-{index}', measurement_unit='г'
+            )
+            for index in range(INGREDIENTS_PER_RECIPE * 2)
+        ]
+        recipes = []
+        for index in range(RECIPES_COUNT):
+            recipe = Recipe.objects.create(
+                author=users[index % len(users)],
+                name=f'budget-{index}',
+                image='recipes/budget.png',
+                text='budget',
+                cooking_time=1,
+            )
+            recipe.tags.set(tags[:index % len(tags) + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=1
+                )
+                for ingredient in ingredients[
+                    index % INGREDIENTS_PER_RECIPE:
+                ][:INGREDIENTS_PER_RECIPE]
+            )
+            recipes.append(recipe)
+        cls.user = users[0]
+        for recipe in recipes[::2]:
+            FavoriteRecipe.objects.create(user=cls.user, recipe=recipe)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscription.objects.create(user=cls.user, subscribed_to=users[1])
+        cls.recipe_id = recipes[0].id
+
+    def setUp(self):
+        cache.clear()
+
+    def check_budgets(self, client):
+        client.get('/api/recipes/')
+        for url, budget in QUERY_BUDGETS:
+            url = url.format(recipe_id=self.recipe_id)
+            with self.subTest(url=url), self.assertNumQueries(budget):
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_anonymous(self):
+        self.check_budgets(APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0]))
+
+    def test_authenticated(self):
+        client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        client.force_authenticate(self.user)
+        self.check_budgets(client)
@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.views import RecipesViewSet
+from recipes.counters import recount
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+
+User = get_user_model()
+
+
+class RecipeCountersTest(TestCase):
+    """Сохранение рецепта не затирает счетчики, измененные параллельно."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.first, cls.second = [
+            User.objects.create(
+                username=f'counter_user_{index}',
+                email=f'counter_user_{index}@example.com',
+            )
+            for index in range(3)
+        ]
+        cls.tag = Tag.objects.create(name='counter', slug='counter')
+        cls.ingredient = Ingredient.objects.create(
+            name='counter', measurement_unit='г'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name='counter',
+            image='recipes/counter.png',
+            text='counter',
+            cooking_time=1,
+        )
+        cls.recipe.tags.set([cls.tag])
+        RecipeIngredient.objects.create(
+            recipe=cls.recipe, ingredient=cls.ingredient, amount=1
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        client.force_authenticate(user)
+        return client
+
+    def favorite(self, user):
+        response = self.client_for(user).post(
+            f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_patch_between_favorite_toggles(self):
+        self.favorite(self.first)
+        # PATCH читает рецепт до второго добавления в избранное,
+        # а сохраняет после него.
+        stale = Recipe.objects.get(pk=self.recipe.pk)
+        self.favorite(self.second)
+        with mock.patch.object(
+            RecipesViewSet, 'get_object', return_value=stale
+        ):
+            response = self.client_for(self.author).patch(
+                f'/api/recipes/{self.recipe.id}/',
+                {
+                    'name': 'renamed',
+                    'text': 'counter',
+                    'cooking_time': 2,
+                    'tags': [self.tag.id],
+                    'ingredients': [
+                        {'id': self.ingredient.id, 'amount': 1}
+                    ],
+                },
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.name, 'renamed')
+        self.assertEqual(recipe.favorites_count, 2)
+        self.assertEqual(
+            recount(dry_run=True)['recipes.Recipe.favorites_count'], 0
+        )
+
+    def test_full_save_keeps_counters(self):
+        stale = Recipe.objects.get(pk=self.recipe.pk)
+        self.favorite(self.first)
+        stale.name = 'admin'
+        stale.save()
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.name, 'admin')
+        self.assertEqual(recipe.favorites_count, 1)
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+
+
+User = get_user_model()
+
+
+class RecipeCursorSearchTest(TestCase):
+    """Поиск не теряет сортировку по релевантности в курсорном режиме."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            username='cursor_user', email='cursor_user@example.com'
+        )
+        now = timezone.now()
+        # Самый старый рецепт самый релевантный.
+        for age, name, text in (
+            (3, 'Борщ борщ', 'борщ'),
+            (2, 'Суп', 'Похож на борщ, но ' + 'без свеклы ' * 20),
+            (1, 'Салат', 'Подают к борщ ' + 'и к супу ' * 40),
+        ):
+            Recipe.objects.create(
+                author=author,
+                name=name,
+                image='recipes/cursor.png',
+                text=text,
+                cooking_time=1,
+                created_at=now - timedelta(days=age),
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('count', response.data)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_search_keeps_relevance_order(self):
+        by_relevance = self.ids('/api/recipes/?search=борщ')
+        self.assertNotEqual(
+            by_relevance,
+            list(Recipe.objects.values_list('id', flat=True))
+        )
+        self.assertEqual(
+            self.ids('/api/recipes/?search=борщ&pagination=cursor'),
+            by_relevance
+        )
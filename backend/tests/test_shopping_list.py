@@ -0,0 +1,221 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+    Tag
+)
+from recipes.shopping_list import expected_totals
+
+
+User = get_user_model()
+
+
+class ShoppingListTotalsTest(TestCase):
+    """Суммы списка покупок совпадают с пересчетом после каждой правки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.first, cls.second = [
+            User.objects.create(
+                username=f'totals_user_{index}',
+                email=f'totals_user_{index}@example.com',
+            )
+            for index in range(3)
+        ]
+        cls.admin = User.objects.create(
+            username='totals_admin',
+            email='totals_admin@example.com',
+            is_staff=True,
+            is_superuser=True,
+        )
+        cls.tag = Tag.objects.create(name='totals', slug='totals')
+        cls.salt, cls.flour, cls.sugar = [
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('соль', 'мука', 'сахар')
+        ]
+        cls.bread, cls.cake = [
+            Recipe.objects.create(
+                author=cls.author,
+                name=name,
+                image='recipes/totals.png',
+                text=name,
+                cooking_time=1,
+            )
+            for name in ('хлеб', 'пирог')
+        ]
+        for recipe in (cls.bread, cls.cake):
+            recipe.tags.set([cls.tag])
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=cls.bread, ingredient=cls.salt, amount=5),
+            RecipeIngredient(
+                recipe=cls.bread, ingredient=cls.flour, amount=500
+            ),
+            RecipeIngredient(recipe=cls.cake, ingredient=cls.salt, amount=1),
+            RecipeIngredient(
+                recipe=cls.cake, ingredient=cls.sugar, amount=200
+            ),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        client.force_authenticate(user)
+        return client
+
+    def assertTotals(self, expected_count):
+        actual = {
+            (user_id, ingredient_id): amount
+            for user_id, ingredient_id, amount in
+            ShoppingListItem.objects.values_list(
+                'user_id', 'ingredient_id', 'amount'
+            )
+        }
+        self.assertEqual(
+            actual,
+            expected_totals(User.objects.values('id'))
+        )
+        self.assertEqual(len(actual), expected_count)
+
+    def add(self, user, recipe):
+        response = self.client_for(user).post(
+            f'/api/recipes/{recipe.id}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_single_add_and_remove(self):
+        self.add(self.first, self.bread)
+        self.add(self.first, self.cake)
+        self.add(self.second, self.bread)
+        self.assertTotals(5)
+        response = self.client_for(self.first).delete(
+            f'/api/recipes/{self.bread.id}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertTotals(4)
+        self.assertEqual(
+            ShoppingListItem.objects.get(
+                user=self.first, ingredient=self.salt
+            ).amount,
+            1
+        )
+
+    def test_bulk_add_and_remove(self):
+        client = self.client_for(self.first)
+        response = client.post(
+            '/api/recipes/shopping_cart/bulk/',
+            {'add': [self.bread.id, self.cake.id]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTotals(3)
+        response = client.post(
+            '/api/recipes/shopping_cart/bulk/',
+            {'remove': [self.bread.id]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTotals(2)
+
+    def test_patch(self):
+        self.add(self.first, self.bread)
+        self.add(self.second, self.bread)
+        self.add(self.second, self.cake)
+        response = self.client_for(self.author).patch(
+            f'/api/recipes/{self.bread.id}/',
+            {
+                'name': 'хлеб',
+                'text': 'хлеб',
+                'cooking_time': 1,
+                'tags': [self.tag.id],
+                'ingredients': [
+                    {'id': self.flour.id, 'amount': 450},
+                    {'id': self.sugar.id, 'amount': 10},
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTotals(5)
+        self.assertFalse(ShoppingListItem.objects.filter(
+            user=self.first, ingredient=self.salt
+        ).exists())
+
+    def test_recipe_delete(self):
+        self.add(self.first, self.bread)
+        self.add(self.first, self.cake)
+        response = self.client_for(self.author).delete(
+            f'/api/recipes/{self.bread.id}/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertTotals(2)
+
+    def test_cart_clear(self):
+        self.add(self.first, self.bread)
+        self.add(self.first, self.cake)
+        self.add(self.second, self.cake)
+        response = self.client_for(self.first).delete(
+            '/api/recipes/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ShoppingCart.objects.filter(user=self.first).exists())
+        self.assertTotals(2)
+
+    def test_admin_inline(self):
+        self.add(self.first, self.bread)
+        self.add(self.second, self.cake)
+        salt = RecipeIngredient.objects.get(
+            recipe=self.bread, ingredient=self.salt
+        )
+        flour = RecipeIngredient.objects.get(
+            recipe=self.bread, ingredient=self.flour
+        )
+        self.client.force_login(self.admin)
+        prefix = 'recipe_ingredients'
+        response = self.client.post(
+            f'/admin/recipes/recipe/{self.bread.id}/change/',
+            {
+                'author': self.author.id,
+                'name': 'хлеб',
+                'tags': [self.tag.id],
+                'text': 'хлеб',
+                'cooking_time': 1,
+                'created_at_0': '2024-01-01',
+                'created_at_1': '00:00:00',
+                'short_link': self.bread.short_link,
+                f'{prefix}-TOTAL_FORMS': 3,
+                f'{prefix}-INITIAL_FORMS': 2,
+                f'{prefix}-MIN_NUM_FORMS': 0,
+                f'{prefix}-MAX_NUM_FORMS': 1000,
+                f'{prefix}-0-id': salt.id,
+                f'{prefix}-0-recipe': self.bread.id,
+                f'{prefix}-0-ingredient': self.salt.id,
+                f'{prefix}-0-amount': 5,
+                f'{prefix}-0-DELETE': 'on',
+                f'{prefix}-1-id': flour.id,
+                f'{prefix}-1-recipe': self.bread.id,
+                f'{prefix}-1-ingredient': self.flour.id,
+                f'{prefix}-1-amount': 300,
+                f'{prefix}-2-recipe': self.bread.id,
+                f'{prefix}-2-ingredient': self.sugar.id,
+                f'{prefix}-2-amount': 20,
+            },
+            HTTP_HOST=settings.ALLOWED_HOSTS[0],
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTotals(4)
+        self.assertEqual(
+            ShoppingListItem.objects.get(
+                user=self.first, ingredient=self.flour
+            ).amount,
+            300
+        )
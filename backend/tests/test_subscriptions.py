@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import Subscription
+
+
+User = get_user_model()
+
+AUTHORS_COUNT = 3
+RECIPES_PER_AUTHOR = 8
+RECIPES_LIMIT = 3
+
+
+class SubscriptionRecipesLimitTest(TestCase):
+    """В подписках у автора только recipes_limit последних рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='subscriber', email='subscriber@example.com'
+        )
+        cls.authors = [
+            User.objects.create(
+                username=f'subscription_author_{index}',
+                email=f'subscription_author_{index}@example.com',
+            )
+            for index in range(AUTHORS_COUNT)
+        ]
+        now = timezone.now()
+        for author in cls.authors:
+            Subscription.objects.create(user=cls.user, subscribed_to=author)
+            for index in range(RECIPES_PER_AUTHOR):
+                Recipe.objects.create(
+                    author=author,
+                    name=f'{author.username}-{index}',
+                    image='recipes/subscription.png',
+                    text='subscription',
+                    cooking_time=1,
+                    # Порядок создания не совпадает с порядком дат.
+                    created_at=now - timedelta(
+                        hours=(index * 5) % RECIPES_PER_AUTHOR
+                    ),
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.client.force_authenticate(self.user)
+
+    def latest_ids(self, author, limit):
+        return list(Recipe.objects.filter(
+            author=author
+        ).order_by('-created_at', '-id').values_list('id', flat=True)[:limit])
+
+    def test_subscriptions(self):
+        response = self.client.get(
+            f'/api/users/subscriptions/?recipes_limit={RECIPES_LIMIT}'
+        )
+        self.assertEqual(response.status_code, 200)
+        results = {
+            author['id']: [recipe['id'] for recipe in author['recipes']]
+            for author in response.data['results']
+        }
+        self.assertEqual(results, {
+            author.id: self.latest_ids(author, RECIPES_LIMIT)
+            for author in self.authors
+        })
+
+    def test_without_limit(self):
+        response = self.client.get('/api/users/subscriptions/')
+        self.assertEqual(response.status_code, 200)
+        for author in response.data['results']:
+            self.assertEqual(len(author['recipes']), RECIPES_PER_AUTHOR)
+
+    def test_subscribe(self):
+        author = self.authors[0]
+        Subscription.objects.filter(
+            user=self.user, subscribed_to=author
+        ).delete()
+        response = self.client.post(
+            f'/api/users/{author.id}/subscribe/?recipes_limit=2'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['recipes']],
+            self.latest_ids(author, 2)
+        )
@@ -0,0 +1,118 @@
+import base64
+import io
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from users.authentication import cache_key
+
+
+User = get_user_model()
+
+PASSWORD = 'Old-pass-123'
+
+
+def png_data_url():
+    buffer = io.BytesIO()
+    Image.new('RGB', (1, 1)).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class CachedTokenAuthTest(TestCase):
+    """Кеш снимков пользователя сбрасывается и не затирает правки."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='token_user@example.com',
+            username='token_user',
+            first_name='token',
+            last_name='user',
+            password=PASSWORD,
+        )
+        self.client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.token = self.login(PASSWORD)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def login(self, password):
+        response = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0]).post(
+            '/api/auth/token/login/',
+            {'email': self.user.email, 'password': password},
+            format='json',
+        )
+        return response.data.get('auth_token')
+
+    def me(self):
+        return self.client.get('/api/users/me/')
+
+    def test_snapshot_has_no_password(self):
+        self.assertEqual(self.me().status_code, 200)
+        snapshot = cache.get(cache_key(self.token))
+        self.assertNotIn(User.objects.get(pk=self.user.pk).password, snapshot)
+
+    def test_logout(self):
+        self.assertEqual(self.me().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_password_change(self):
+        self.assertEqual(self.me().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/users/set_password/',
+                {
+                    'current_password': PASSWORD,
+                    'new_password': 'New-pass-456',
+                },
+                format='json',
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(cache.get(cache_key(self.token)))
+        self.assertIsNone(self.login(PASSWORD))
+        self.assertIsNotNone(self.login('New-pass-456'))
+
+    def test_deactivation(self):
+        self.assertEqual(self.me().status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(self.me().status_code, 401)
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_avatar_keeps_admin_changes(self):
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        cache.clear()
+        self.assertEqual(self.me().status_code, 200)
+        # Понижение без сигналов: снимок в кеше процесса остается
+        # прежним, как в процессе, который еще не узнал о правке.
+        User.objects.filter(pk=self.user.pk).update(
+            is_staff=False, first_name='admin'
+        )
+        response = self.client.put(
+            '/api/users/me/avatar/', {'avatar': png_data_url()},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertFalse(user.is_staff)
+        self.assertEqual(user.first_name, 'admin')
+        self.assertTrue(user.avatar)
+
+    def test_stale_snapshot_of_deactivated_user_cannot_write(self):
+        self.assertEqual(self.me().status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.put(
+            '/api/users/me/avatar/', {'avatar': png_data_url()},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 401)
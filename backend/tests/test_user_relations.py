@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from users.models import Subscription
+from users.relations import (
+    UserRelations,
+    get_user_relations,
+    invalidate_user_relations
+)
+
+
+User = get_user_model()
+
+
+class UserRelationsCacheTest(TestCase):
+    """Сброс во время загрузки не оставляет в кеше устаревшие связи."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = [
+            User.objects.create(
+                username=f'relations_user_{index}',
+                email=f'relations_user_{index}@example.com',
+            )
+            for index in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def relations(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        return get_user_relations(request)
+
+    def test_invalidation_during_load(self):
+        load = UserRelations.load
+
+        def load_then_subscribe(user_id):
+            # Загрузка прочитала старые связи, а параллельный запрос
+            # успел подписаться и сбросить кеш до записи в него.
+            relations = load(user_id)
+            Subscription.objects.create(
+                user=self.user, subscribed_to=self.author
+            )
+            invalidate_user_relations(user_id)
+            return relations
+
+        with mock.patch.object(
+            UserRelations, 'load', side_effect=load_then_subscribe
+        ):
+            self.assertEqual(self.relations().subscriptions, frozenset())
+        self.assertEqual(
+            self.relations().subscriptions, frozenset([self.author.id])
+        )
+
+    def test_cached_until_invalidated(self):
+        self.relations()
+        Subscription.objects.create(user=self.user, subscribed_to=self.author)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.relations().subscriptions, frozenset())
+        invalidate_user_relations(self.user.id)
+        self.assertEqual(
+            self.relations().subscriptions, frozenset([self.author.id])
+        )
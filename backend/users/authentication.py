@@ -0,0 +1,83 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from backend.lru import LRUCache
+from backend.metrics import record_cache
+from users import constants
+from users.models import User
+
+
+CACHE_KEY = 'auth_token:{}'
+# Счетчики меняются UPDATE без сигналов, в снимок они не попадают
+# и остаются отложенными полями: save() пользователя их не перезапишет.
+# Хеш пароля в кеш не кладется и читается из БД при обращении.
+DEFERRED_FIELDS = ('password', 'recipes_count', 'subscribers_count')
+SNAPSHOT_FIELDS = [
+    field.attname for field in User._meta.concrete_fields
+    if field.attname not in DEFERRED_FIELDS
+]
+
+local_cache = LRUCache(
+    maxsize=constants.TOKEN_LRU_SIZE,
+    ttl=constants.TOKEN_LRU_TTL
+)
+
+
+def cache_key(key):
+    return CACHE_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def invalidate_token(key):
+    local_cache.delete(key)
+    cache.delete(cache_key(key))
+
+
+def invalidate_user_tokens(user_id):
+    for key in Token.objects.filter(
+        user_id=user_id
+    ).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Токен-аутентификация без запроса к БД на горячем пути.
+
+    Снимок пользователя хранится в кеше процесса (TOKEN_LRU_TTL секунд)
+    и в общем кеше. Выход, смена пароля и деактивация сбрасывают общий
+    кеш сразу, кеш других процессов — не позже чем через TOKEN_LRU_TTL.
+    """
+
+    def authenticate_credentials(self, key):
+        values = local_cache.get(key)
+        if values is None:
+            values = cache.get(cache_key(key))
+            record_cache('auth_tokens', values is not None)
+            if values is None:
+                values = self.load(key)
+                cache.set(
+                    cache_key(key), values, constants.TOKEN_CACHE_TTL
+                )
+            local_cache.set(key, values)
+        user = User.from_db(DEFAULT_DB_ALIAS, SNAPSHOT_FIELDS, values)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                'Пользователь неактивен или удален.'
+            )
+        token = Token(key=key, user=user)
+        token._state.adding = False
+        return user, token
+
+    @staticmethod
+    def load(key):
+        """Снимок читается с основной БД: реплика может отставать."""
+        values = User.objects.using(DEFAULT_DB_ALIAS).filter(
+            auth_token__key=key
+        ).values_list(*SNAPSHOT_FIELDS).first()
+        if values is None:
+            raise exceptions.AuthenticationFailed('Недействительный токен.')
+        return list(values)
@@ -1,2 +1,6 @@
 MAX_LEN_FIELDS = 254
 MAX_LEN_NAME = 150
+RELATIONS_CACHE_TTL = 60 * 10
+TOKEN_CACHE_TTL = 60 * 10
+TOKEN_LRU_SIZE = 10000
+TOKEN_LRU_TTL = 5
@@ -16,6 +16,12 @@ class User(AbstractUser):
     first_name = models.CharField(max_length=users.constants.MAX_LEN_NAME)
     last_name = models.CharField(max_length=users.constants.MAX_LEN_NAME)
     avatar = models.ImageField(upload_to='users/', blank=True, null=True)
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов', default=0, editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0, editable=False
+    )
 
     objects = SuperUserManager()
 
@@ -0,0 +1,92 @@
+from array import array
+
+from django.core.cache import cache
+
+from backend.metrics import record_cache
+from recipes.models import FavoriteRecipe, ShoppingCart
+from users import constants
+from users.models import Subscription
+
+
+CACHE_KEY = 'user_relations:{}'
+# Поколение связей пользователя: сброс его увеличивает, и снимок,
+# загруженный до сброса, уже не считается актуальным.
+GENERATION_KEY = 'user_relations_generation:{}'
+
+
+class UserRelations:
+    """Id избранных рецептов, рецептов в корзине и авторов в подписках.
+
+    В общем кеше множества лежат компактными массивами int64,
+    в памяти запроса — frozenset для проверки за O(1).
+    """
+
+    __slots__ = ('favorites', 'shopping_cart', 'subscriptions')
+
+    def __init__(self, favorites, shopping_cart, subscriptions):
+        self.favorites = frozenset(favorites)
+        self.shopping_cart = frozenset(shopping_cart)
+        self.subscriptions = frozenset(subscriptions)
+
+    @classmethod
+    def load(cls, user_id):
+        return cls(
+            FavoriteRecipe.objects.filter(
+                user_id=user_id
+            ).values_list('recipe_id', flat=True),
+            ShoppingCart.objects.filter(
+                user_id=user_id
+            ).values_list('recipe_id', flat=True),
+            Subscription.objects.filter(
+                user_id=user_id
+            ).values_list('subscribed_to_id', flat=True),
+        )
+
+    def pack(self):
+        return tuple(
+            array('q', sorted(getattr(self, name))).tobytes()
+            for name in self.__slots__
+        )
+
+    @classmethod
+    def unpack(cls, packed):
+        return cls(*(array('q', data) for data in packed))
+
+
+def get_user_relations(request):
+    """Связи текущего пользователя, один раз на запрос.
+
+    Для анонимного пользователя возвращает None.
+    """
+    if request is None or not request.user.is_authenticated:
+        return None
+    relations = getattr(request, '_user_relations', None)
+    if relations is not None:
+        return relations
+    user_id = request.user.id
+    key = CACHE_KEY.format(user_id)
+    generation_key = GENERATION_KEY.format(user_id)
+    cached = cache.get_many([key, generation_key])
+    generation = cached.get(generation_key, 0)
+    packed = cached.get(key)
+    hit = packed is not None and packed[0] == generation
+    record_cache('user_relations', hit)
+    if hit:
+        relations = UserRelations.unpack(packed[1:])
+    else:
+        # Поколение прочитано до загрузки: если сброс успеет между
+        # загрузкой и записью, запись останется с прежним поколением.
+        relations = UserRelations.load(user_id)
+        cache.set(
+            key, (generation, *relations.pack()),
+            constants.RELATIONS_CACHE_TTL
+        )
+    request._user_relations = relations
+    return relations
+
+
+def invalidate_user_relations(user_id):
+    generation_key = GENERATION_KEY.format(user_id)
+    cache.add(generation_key, 0, None)
+    cache.incr(generation_key)
+    cache.delete(CACHE_KEY.format(user_id))
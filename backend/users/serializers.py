@@ -1,13 +1,11 @@
-import base64
-import os
-
-from django.core.files.base import ContentFile
 from django.contrib.auth import get_user_model
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
 from rest_framework import serializers
 
+from api.fields import Base64ImageField, ImageVariantsField
 from recipes.models import Recipe
 from users.models import Subscription
+from users.relations import get_user_relations
 
 
 User = get_user_model()
@@ -51,46 +49,25 @@ class UserDetailSerializer(serializers.ModelSerializer):
             'avatar'
         )
 
-    def get_subscribed_to(self, obj):
-        request = self.context.get('request')
-        if request.user.is_authenticated:
-            return Subscription.objects.filter(
-                user=request.user,
-                subscribed_to=obj
-            ).exists()
-        return False
-
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request.user.is_authenticated:
-            return Subscription.objects.filter(
-                user=request.user,
-                subscribed_to=obj
-            ).exists()
-        return False
+        relations = get_user_relations(self.context.get('request'))
+        return relations is not None and obj.id in relations.subscriptions
 
 
 class AvatarSerializer(serializers.Serializer):
     """Сериализатор для изменения аватара."""
 
-    avatar = serializers.CharField()
-
-    def to_internal_value(self, data):
-        validated_data = super().to_internal_value(data)
-        base64_data = validated_data['avatar'].split(",")[1]
-        image_data = base64.b64decode(base64_data)
-        file_name = f"avatar_{os.urandom(16).hex()}.png"
-        image_file = ContentFile(image_data, name=file_name)
-        validated_data['avatar'] = image_file
-        return validated_data
+    avatar = Base64ImageField(file_prefix='avatar')
 
 
 class ShortRecipesSerializer(serializers.ModelSerializer):
     """Сокращенный сериализатор для рецептов в подписках."""
 
+    images = ImageVariantsField(source='image_variants')
+
     class Meta:
         model = Recipe
-        fields = ['id', 'name', 'image', 'cooking_time']
+        fields = ['id', 'name', 'image', 'images', 'cooking_time']
 
 
 class DetailSubscriptionSerializer(serializers.ModelSerializer):
@@ -98,7 +75,7 @@ class DetailSubscriptionSerializer(serializers.ModelSerializer):
 
     recipes = ShortRecipesSerializer(many=True, read_only=True)
     is_subscribed = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta:
         model = User
@@ -115,26 +92,8 @@ class DetailSubscriptionSerializer(serializers.ModelSerializer):
         ]
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Subscription.objects.filter(
-                user=request.user,
-                subscribed_to=obj
-            ).exists()
-        return False
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
-    def to_representation(self, instance):
-        recipes_limit = self.context[
-            'request'
-        ].query_params.get('recipes_limit')
-        representation = super().to_representation(instance)
-        if recipes_limit:
-            limit = int(recipes_limit)
-            representation['recipes'] = representation['recipes'][:limit]
-        return representation
+        relations = get_user_relations(self.context.get('request'))
+        return relations is not None and obj.id in relations.subscriptions
 
     def validate(self, attrs):
         request = self.context.get('request')
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.counters import change
+from recipes.models import FavoriteRecipe, ShoppingCart
+from users.authentication import invalidate_token, invalidate_user_tokens
+from users.models import Subscription, User
+from users.relations import invalidate_user_relations
+
+
+@receiver([post_save, post_delete], sender=FavoriteRecipe)
+@receiver([post_save, post_delete], sender=ShoppingCart)
+@receiver([post_save, post_delete], sender=Subscription)
+def invalidate_relations(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: invalidate_user_relations(instance.user_id)
+    )
+
+
+@receiver(post_save, sender=Subscription)
+def increment_subscribers_count(sender, instance, created, **kwargs):
+    if created:
+        change(User, instance.subscribed_to_id, 'subscribers_count', 1)
+
+
+@receiver(post_delete, sender=Subscription)
+def decrement_subscribers_count(sender, instance, **kwargs):
+    change(User, instance.subscribed_to_id, 'subscribers_count', -1)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, created, **kwargs):
+    """Смена пароля, деактивация и правка профиля обновляют снимок."""
+    if not created:
+        transaction.on_commit(lambda: invalidate_user_tokens(instance.pk))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    # key — первичный ключ, delete() обнулит его до конца транзакции.
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_token(key))
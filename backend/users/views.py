@@ -1,11 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch, prefetch_related_objects
 from djoser.views import UserViewSet
-from rest_framework import status
+from rest_framework import exceptions, status
 from rest_framework.decorators import action
 from rest_framework.pagination import LimitOffsetPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
 
+from recipes.latest import latest_recipe_ids
+from recipes.models import Recipe
 from users.models import Subscription
 from users.permissions import IsAuthenticatedOrReadOnly
 from users.serializers import (
@@ -26,6 +29,50 @@ class UserViewSet(UserViewSet):
     serializer_class = UserDetailSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def initial(self, request, *args, **kwargs):
+        """Изменяющие запросы работают со свежей строкой пользователя.
+
+        request.user собран из кешированного снимка, который в других
+        процессах может отставать на TOKEN_LRU_TTL. Его save() вернул бы
+        старые is_active, is_staff или email поверх правок админа.
+        """
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS or not request.user.is_authenticated:
+            return
+        user = User.objects.filter(pk=request.user.pk).first()
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                'Пользователь неактивен или удален.'
+            )
+        request.user = user
+
+    @staticmethod
+    def get_recipes_limit(request):
+        try:
+            limit = int(request.query_params.get('recipes_limit', ''))
+        except ValueError:
+            return None
+        return limit if limit >= 0 else None
+
+    def prefetch_recipes(self, request, users):
+        """Подгружает авторам не более recipes_limit последних рецептов.
+
+        Рецепты всех авторов страницы выбираются одним запросом, их
+        число ограничивается для каждого автора в подзапросе.
+        """
+        users = list(users)
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'image_variants', 'cooking_time',
+            'author_id'
+        )
+        limit = self.get_recipes_limit(request)
+        if limit is not None and users:
+            recipes = recipes.filter(pk__in=latest_recipe_ids(
+                (user.pk for user in users), limit
+            ))
+        prefetch_related_objects(users, Prefetch('recipes', queryset=recipes))
+        return users
+
     @action(
         detail=False,
         methods=['get'],
@@ -49,7 +96,7 @@ class UserViewSet(UserViewSet):
             serializer = AvatarSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
             user.avatar = serializer.validated_data['avatar']
-            user.save()
+            user.save(update_fields=['avatar'])
             avatar_url = (
                 request.build_absolute_uri(
                     user.avatar.url
@@ -59,7 +106,7 @@ class UserViewSet(UserViewSet):
         if user.avatar:
             user.avatar.delete(save=False)
             user.avatar = None
-            user.save()
+            user.save(update_fields=['avatar'])
             return Response(
                 {'detail': 'Аватар успешно удален.'},
                 status=status.HTTP_204_NO_CONTENT
@@ -81,9 +128,9 @@ class UserViewSet(UserViewSet):
             })
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            self.prefetch_recipes(request, [user_to_subscribe])
             detail_serializer = DetailSubscriptionSerializer(
-                user_to_subscribe,
-                context={'request': request}
+                user_to_subscribe, context={'request': request}
             )
             response_data = detail_serializer.data
             response_data['is_subscribed'] = True
@@ -108,23 +155,19 @@ class UserViewSet(UserViewSet):
         permission_classes=[IsAuthenticated],
     )
     def subscriptions(self, request):
-        subscriptions = Subscription.objects.filter(
-            user=request.user
-        ).select_related('subscribed_to')
-        subscribed_users = [
-            subscription.subscribed_to for subscription in subscriptions
-        ]
-        serializer = UserDetailSerializer(
-            subscribed_users,
-            many=True,
-            context={'request': request}
+        subscribed_users = User.objects.filter(
+            subscribers__user=request.user
         )
         page = self.paginate_queryset(subscribed_users)
         if page is not None:
             serializer = DetailSubscriptionSerializer(
-                page, many=True,
+                self.prefetch_recipes(request, page), many=True,
                 context={'request': request}
             )
             return self.get_paginated_response(serializer.data)
-
+        serializer = DetailSubscriptionSerializer(
+            self.prefetch_recipes(request, subscribed_users),
+            many=True,
+            context={'request': request}
+        )
         return Response(serializer.data, status=status.HTTP_200_OK)